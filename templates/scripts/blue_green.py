@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+蓝绿部署（由 Clone-Bot 生成，随仓库分发，在应用服务器上运行）。
+
+应用以 blue / green 两个 compose project 运行在不同的本机端口，对外的 48080 由反向代理（nginx）监听：
+1. 在空闲颜色的端口上启动新版本，旧版本继续服务
+2. 轮询新版本的 /actuator/health 直到 UP（deploy_probe.py）；超时则停掉新版本，代理不动，退出码 1
+3. 改写代理的 upstream 文件并 reload，经代理再探测一次；失败则恢复 upstream、停掉新版本
+4. 记录当前颜色，等待 --drain 秒让旧版本处理完已接收的请求，再停掉旧版本
+
+首次蓝绿部署（还没有 state 文件）时，旧的单容器部署在新版本就绪后用 --legacy-stop 停掉，
+随后代理接管 48080，中断时间只有代理启动的几秒。
+
+启动 / 停止 / reload 都是 shell 命令模板（{color}、{port} 会被替换，也通过环境变量 COLOR / PORT 传入），
+本地可以用普通进程代替容器验证切换逻辑：
+
+    python3 blue_green.py deploy --dir /tmp/bg \\
+        --start "python3 -m http.server {port} --directory /tmp/bg/health-{color} & echo \\$! > /tmp/bg/{color}.pid" \\
+        --stop "kill \\$(cat /tmp/bg/{color}.pid)" --logs "true" --reload "true" \\
+        --legacy-stop "true" --legacy-start "true" \\
+        --health-url "http://127.0.0.1:{port}/" --proxy-url "" --drain 0
+
+用法（服务器上，/usr/local/myapp）：
+    python3 blue_green.py deploy --timeout 180 --drain 20
+    python3 blue_green.py status
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from deploy_probe import wait_healthy
+
+COLORS = {"blue": 48081, "green": 48082}
+
+COMPOSE_APP = "docker compose -p future-{color} -f compose.bluegreen.yml"
+COMPOSE_PROXY = "docker compose -p future-proxy -f compose.proxy.yml"
+
+DEFAULT_START = f"{COMPOSE_APP} up -d --build"
+DEFAULT_STOP = f"{COMPOSE_APP} down"
+DEFAULT_LOGS = f"{COMPOSE_APP} logs --tail 50 app"
+# 代理未运行时 up -d 启动它（读取新的 upstream），已运行时 reload 平滑切换（旧 worker 处理完已有连接才退出）
+DEFAULT_RELOAD = (f"{COMPOSE_PROXY} up -d && "
+                  f"{COMPOSE_PROXY} exec -T proxy nginx -c /etc/nginx/clonebot/nginx.conf -s reload")
+# 迁移前的单容器部署（同目录下的 docker-compose.yml）；首次切换失败时重新拉起
+DEFAULT_LEGACY_STOP = "docker compose down"
+DEFAULT_LEGACY_START = "docker compose up -d"
+
+DEFAULT_HEALTH_URL = "http://127.0.0.1:{port}/actuator/health"
+DEFAULT_PROXY_URL = "http://127.0.0.1:48080/actuator/health"
+DEFAULT_TIMEOUT = 180.0
+PROXY_TIMEOUT = 30.0
+DEFAULT_DRAIN = 20.0
+
+STATE_FILE = "bluegreen.json"
+UPSTREAM_FILE = Path("proxy") / "upstream.conf"
+LOCK_FILE = ".bluegreen.lock"
+
+
+class DeployFailed(Exception):
+    pass
+
+
+def load_state(root: Path) -> dict | None:
+    try:
+        return json.loads((root / STATE_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(path: Path, text: str):
+    """同目录临时文件 + rename：代理 / 下次部署不会读到写了一半的文件。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def upstream_conf(port: int) -> str:
+    return f"server 127.0.0.1:{port};\n"
+
+
+def run(template: str, color: str, root: Path, check: bool = True) -> bool:
+    """执行命令模板；check=True 时失败抛 DeployFailed，否则返回是否成功。"""
+    port = COLORS[color]
+    command = template.format(color=color, port=port)
+    print(f"$ {command}", flush=True)
+    proc = subprocess.run(command, shell=True, cwd=root, env={**os.environ, "COLOR": color, "PORT": str(port)})
+    if proc.returncode != 0 and check:
+        raise DeployFailed(f"命令失败（退出码 {proc.returncode}）: {command}")
+    return proc.returncode == 0
+
+
+def discard(root: Path, args, color: str):
+    """新版本失败：先留下日志，再停掉（down 会删除容器和日志）。"""
+    run(args.logs, color, root, check=False)
+    run(args.stop, color, root, check=False)
+
+
+def switch(root: Path, args, color: str, previous: str | None):
+    """把代理指向 color 并确认经代理可用；失败时恢复原来的 upstream。"""
+    upstream = root / UPSTREAM_FILE
+    old_conf = upstream.read_text(encoding="utf-8") if upstream.exists() else None
+    write_atomic(upstream, upstream_conf(COLORS[color]))
+    try:
+        run(args.reload, color, root)
+        if args.proxy_url and wait_healthy(args.proxy_url, PROXY_TIMEOUT) is None:
+            raise DeployFailed(f"经代理访问 {args.proxy_url} 不可用")
+    except DeployFailed:
+        if old_conf is not None:
+            print(f"↩️  恢复代理 upstream -> {previous}", flush=True)
+            write_atomic(upstream, old_conf)
+            run(args.reload, previous or color, root, check=False)
+        raise
+
+
+def deploy(root: Path, args) -> int:
+    state = load_state(root)
+    previous = state["active"] if state else None
+    color = "green" if previous == "blue" else "blue"
+    print(f"🚀 {previous or '（单容器部署）'} -> {color}（端口 {COLORS[color]}）", flush=True)
+
+    # 上次失败可能留下同色容器，先清掉
+    run(args.stop, color, root, check=False)
+    try:
+        run(args.start, color, root)
+    except DeployFailed as e:
+        print(f"❌ {e}")
+        discard(root, args, color)
+        return 1
+
+    health_url = args.health_url.format(color=color, port=COLORS[color])
+    print(f"🏥 waiting for {health_url} (timeout {args.timeout:.0f}s)", flush=True)
+    elapsed = wait_healthy(health_url, args.timeout)
+    if elapsed is None:
+        print(f"❌ {color} 在 {args.timeout:.0f}s 内未就绪，停止新版本，流量仍由 {previous or '原部署'} 处理")
+        discard(root, args, color)
+        return 1
+    print(f"✅ {color} healthy after {elapsed:.1f}s", flush=True)
+
+    try:
+        if previous is None:
+            print("🔁 停止原单容器部署，代理接管对外端口", flush=True)
+            run(args.legacy_stop, color, root)
+        switch(root, args, color, previous)
+    except DeployFailed as e:
+        print(f"❌ 切换失败: {e}")
+        discard(root, args, color)
+        if previous is None:
+            print("↩️  重新启动原单容器部署", flush=True)
+            run(args.legacy_start, color, root, check=False)
+        return 1
+
+    write_atomic(root / STATE_FILE, json.dumps({"active": color, "port": COLORS[color], "since": time.time()}) + "\n")
+    print(f"🔀 代理已切换到 {color}", flush=True)
+
+    if previous is not None:
+        print(f"⏳ 等待 {args.drain:.0f}s 让 {previous} 处理完已接收的请求...", flush=True)
+        time.sleep(args.drain)
+        if not run(args.stop, previous, root, check=False):
+            print(f"⚠️  停止 {previous} 失败，请手动清理")
+    print(f"🎉 {color} 已上线")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="蓝绿部署：新版本就绪后切换代理，再停旧版本")
+    parser.add_argument("command", choices=("deploy", "status"))
+    parser.add_argument("--dir", type=Path, default=Path("."), help="部署目录（compose 文件、state、proxy/ 所在）")
+    parser.add_argument("--start", default=DEFAULT_START, help="启动某个颜色的命令模板")
+    parser.add_argument("--stop", default=DEFAULT_STOP, help="停止某个颜色的命令模板")
+    parser.add_argument("--logs", default=DEFAULT_LOGS, help="新版本失败时、停止前打印日志的命令模板")
+    parser.add_argument("--reload", default=DEFAULT_RELOAD, help="让代理读取新 upstream 的命令")
+    parser.add_argument("--legacy-stop", default=DEFAULT_LEGACY_STOP, help="首次蓝绿部署时停止原单容器部署的命令")
+    parser.add_argument("--legacy-start", default=DEFAULT_LEGACY_START, help="首次蓝绿切换失败时恢复原部署的命令")
+    parser.add_argument("--health-url", default=DEFAULT_HEALTH_URL, help="新版本的健康检查地址模板")
+    parser.add_argument("--proxy-url", default=DEFAULT_PROXY_URL, help="经代理的健康检查地址（空串跳过）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="新版本就绪的截止时间（秒）")
+    parser.add_argument("--drain", type=float, default=DEFAULT_DRAIN, help="切换后停止旧版本前的等待（秒）")
+    args = parser.parse_args()
+
+    root = args.dir.resolve()
+    if args.command == "status":
+        state = load_state(root)
+        print(json.dumps(state, indent=2) if state else "ℹ️  尚未进行蓝绿部署")
+        return 0
+
+    # 两次部署同时进行会抢同一个空闲颜色
+    with open(root / LOCK_FILE, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("❌ 另一个部署正在进行")
+            return 1
+        return deploy(root, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
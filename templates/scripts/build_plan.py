@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+根据本次 push 改动的文件计算 Maven 构建计划（由 Clone-Bot 生成，随仓库分发）。
+
+- 从根 pom.xml 沿 <module> 展开 reactor，建立模块依赖图（<dependency>、BOM import、<parent>）
+- 改动文件归属到最深的模块目录；改动模块及其所有下游模块即为受影响模块
+- 输出 `-pl :a,:b -am`，只构建受影响模块（-am 带上它们的上游）
+
+输出（--github-output 时写入 $GITHUB_OUTPUT）：
+    skip        true = 没有受影响的模块，不需要构建
+    full        true = 需要全量构建（首次 push、拿不到 diff、根 pom / .mvn / workflow 改动）
+    maven_args  传给 mvn 的 -pl 参数（全量构建时为空）
+    server      true = 本次会产出应用 jar，需要部署
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import deque
+from pathlib import Path
+
+APP_ARTIFACTS = {"future-server"}
+
+# 这些路径的改动影响整个构建
+FULL_BUILD_PREFIXES = (".mvn/", ".github/workflows/", ".github/scripts/", ".github/deploy/")
+
+RE_MODULE = re.compile(r"<module>\s*([^<]+?)\s*</module>")
+RE_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+RE_PARENT = re.compile(r"<parent>\s*.*?</parent>", re.DOTALL)
+RE_DEP = re.compile(r"<dependency>\s*.*?</dependency>", re.DOTALL)
+RE_AID = re.compile(r"<artifactId>\s*([^<]+?)\s*</artifactId>")
+RE_PACKAGING = re.compile(r"<packaging>\s*([^<]+?)\s*</packaging>")
+RE_HEAD_END = re.compile(r"<(?:dependencies|dependencyManagement|build|profiles|modules|properties)>")
+
+
+class Module:
+    def __init__(self, path: str, xml: str):
+        self.path = path  # 相对仓库根的目录，根模块为 ""
+        head = RE_PARENT.sub("", xml, count=1)
+        m = RE_HEAD_END.search(head)
+        aid = RE_AID.search(head[:m.start()] if m else head)
+        self.artifact_id = aid.group(1) if aid else path
+        pm = RE_PACKAGING.search(xml)
+        self.aggregator = bool(pm and pm.group(1) == "pom")
+        parent = RE_PARENT.search(xml)
+        pa = RE_AID.search(parent.group(0)) if parent else None
+        self.parent = pa.group(1) if pa else None
+        self.deps = {a.group(1) for d in RE_DEP.findall(xml) if (a := RE_AID.search(d))}
+        self.children = RE_MODULE.findall(xml)
+
+
+def load_reactor(root: Path) -> dict[str, Module]:
+    modules: dict[str, Module] = {}
+    queue = deque([""])
+    while queue:
+        rel = queue.popleft()
+        pom = root / rel / "pom.xml"
+        if not pom.exists():
+            continue
+        mod = Module(rel, RE_COMMENT.sub("", pom.read_text(encoding="utf-8")))
+        modules[mod.artifact_id] = mod
+        for child in mod.children:
+            queue.append(os.path.normpath(os.path.join(rel, child)).replace(os.sep, "/"))
+    return modules
+
+
+def downstream(modules: dict[str, Module], changed: set[str]) -> set[str]:
+    """changed 及所有（传递）依赖它们的模块。"""
+    users: dict[str, set[str]] = {aid: set() for aid in modules}
+    for mod in modules.values():
+        for up in mod.deps | ({mod.parent} if mod.parent else set()):
+            if up in users:
+                users[up].add(mod.artifact_id)
+    result, queue = set(changed), deque(changed)
+    while queue:
+        for user in users[queue.popleft()]:
+            if user not in result:
+                result.add(user)
+                queue.append(user)
+    return result
+
+
+def owner_module(modules: dict[str, Module], path: str) -> Module | None:
+    """文件所属的最深模块；聚合模块只认它自己的 pom.xml。"""
+    best = None
+    for mod in modules.values():
+        prefix = f"{mod.path}/" if mod.path else ""
+        if not path.startswith(prefix):
+            continue
+        if mod.aggregator and path != f"{prefix}pom.xml":
+            continue
+        if best is None or len(mod.path) > len(best.path):
+            best = mod
+    return best
+
+
+def changed_files(base: str | None, head: str) -> list[str] | None:
+    """None 表示拿不到 diff（首次 push / base 不在本地），需要全量构建。"""
+    if not base or set(base) == {"0"}:
+        return None
+    proc = subprocess.run(["git", "diff", "--name-only", base, head], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return [line for line in proc.stdout.splitlines() if line]
+
+
+def plan(root: Path, files: list[str] | None) -> dict[str, str]:
+    modules = load_reactor(root)
+    full = {"skip": "false", "full": "true", "maven_args": "", "server": "true"}
+    if files is None or any(f.startswith(FULL_BUILD_PREFIXES) for f in files):
+        return full
+
+    changed = set()
+    for f in files:
+        if "/target/" in f:
+            continue
+        mod = owner_module(modules, f)
+        if mod is not None:
+            changed.add(mod.artifact_id)
+    if not changed:
+        return {"skip": "true", "full": "false", "maven_args": "", "server": "false"}
+
+    affected = downstream(modules, changed)
+    buildable = sorted(a for a in affected if not modules[a].aggregator)
+    if len(buildable) == sum(1 for m in modules.values() if not m.aggregator):
+        return full
+    if not buildable:
+        return {"skip": "true", "full": "false", "maven_args": "", "server": "false"}
+    return {
+        "skip": "false",
+        "full": "false",
+        "maven_args": "-pl " + ",".join(f":{a}" for a in buildable) + " -am",
+        "server": "true" if APP_ARTIFACTS & set(buildable) else "false",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计算增量 Maven 构建计划")
+    parser.add_argument("--base", help="上一次 push 的 commit（github.event.before）")
+    parser.add_argument("--head", default="HEAD")
+    parser.add_argument("--github-output", action="store_true", help="结果写入 $GITHUB_OUTPUT")
+    args = parser.parse_args()
+
+    files = changed_files(args.base, args.head)
+    result = plan(Path("."), files)
+
+    if files is None:
+        print("ℹ️  no usable diff base, full build")
+    else:
+        print(f"📝 changed files: {len(files)}")
+    for k, v in result.items():
+        print(f"   {k} = {v}")
+
+    if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            for k, v in result.items():
+                f.write(f"{k}={v}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+在 CI 中生成 AppCDS 归档（由 Clone-Bot 生成，随仓库分发）。
+
+冷启动的大部分时间花在从几百个 jar 里加载、校验上万个类。训练启动一次并把加载过的类
+转储为动态 CDS 归档，之后的启动直接映射归档，省去解析与校验：
+
+1. 用 jar_layers.py 拆出的层 + 部署用的 Dockerfile 构建镜像（与线上同一 JDK、同一 /app 路径，
+   否则 JVM 会拒绝归档）；基础镜像解析为 digest 记在 base-image 里，服务器构建时用同一个
+2. 以 -XX:ArchiveClassesAtExit 运行容器，连 CI 的 Postgres / Redis，
+   -Dspring.context.exit=onRefresh 让应用在上下文刷新完成后退出
+3. 归档（future-server.jsa）与 base-image 打成 cds 层，写入 layers.json，随其他层一起增量上传
+
+训练失败不影响部署：cds 层为空，容器照常启动，只是没有 CDS 加速。
+
+用法：
+    python3 .github/scripts/cds_archive.py dist/layers --dockerfile .github/deploy/Dockerfile \\
+        --env DB_HOST --env DB_USERNAME --env DB_PASSWORD --env REDIS_HOST --env REDIS_PASSWORD
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from jar_layers import LAYERS, MANIFEST, pack_layer, write_manifest
+
+LAYER = "cds"
+ARCHIVE = "future-server.jsa"
+BASE_IMAGE_FILE = "base-image"
+DEFAULT_BASE_IMAGE = "eclipse-temurin:17-jre"
+TRAIN_IMAGE = "future-server:cds-train"
+TRAIN_CONTAINER = "future-server-cds-train"
+DEFAULT_TIMEOUT = 300.0
+
+
+def docker(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(["docker", *args], check=True, **kwargs)
+
+
+def resolve_base_image(image: str) -> str:
+    """tag 会漂移到新的 JDK 补丁版本；解析成 digest，训练与线上用完全相同的 JVM。"""
+    docker("pull", "-q", image, stdout=subprocess.DEVNULL)
+    out = docker("image", "inspect", "--format", "{{index .RepoDigests 0}}", image, capture_output=True, text=True)
+    return out.stdout.strip() or image
+
+
+def build_context(layers: Path, dockerfile: Path, ctx: Path):
+    """与服务器上相同的构建目录：layers/<层名>/ 由 tar 解出（mtime 为 0，与线上一致，CDS 校验 jar 的 mtime）。"""
+    for name in LAYERS:
+        dest = ctx / "layers" / name
+        dest.mkdir(parents=True)
+        with tarfile.open(layers / f"{name}.tar") as tar:
+            tar.extractall(dest, filter="data")
+    (ctx / "layers" / LAYER).mkdir()
+    shutil.copyfile(dockerfile, ctx / "Dockerfile")
+
+
+def train(layers: Path, dockerfile: Path, base_image: str, env_names: list[str], timeout: float, out: Path) -> bool:
+    """训练启动并把归档写到 out/；返回是否生成了归档。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = Path(tmp)
+        build_context(layers, dockerfile, ctx)
+        docker("build", "-q", "--build-arg", f"BASE_IMAGE={base_image}", "-t", TRAIN_IMAGE, str(ctx),
+               stdout=subprocess.DEVNULL)
+
+    cds_opts = f"-XX:ArchiveClassesAtExit=/cds/{ARCHIVE} -Dspring.context.exit=onRefresh"
+    command = ["docker", "run", "--rm", "--name", TRAIN_CONTAINER, "--network", "host",
+               "-v", f"{out.resolve()}:/cds", "-e", f"CDS_OPTS={cds_opts}"]
+    for name in env_names:
+        command += ["-e", name]
+    try:
+        proc = subprocess.run([*command, TRAIN_IMAGE], timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"⚠️  训练启动超过 {timeout:.0f}s，终止")
+        subprocess.run(["docker", "rm", "-f", TRAIN_CONTAINER], stdout=subprocess.DEVNULL)
+        return False
+    if proc.returncode != 0:
+        print(f"⚠️  训练启动退出码 {proc.returncode}（归档只包含退出前加载的类）")
+    return (out / ARCHIVE).exists()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="训练启动并生成 AppCDS 归档（cds 层）")
+    parser.add_argument("layers", type=Path, help="jar_layers.py extract 的输出目录")
+    parser.add_argument("--dockerfile", type=Path, required=True, help="部署用的 Dockerfile")
+    parser.add_argument("--base-image", default=DEFAULT_BASE_IMAGE)
+    parser.add_argument("--env", action="append", default=[], help="传给训练容器的环境变量名（可重复）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="训练启动的超时（秒）")
+    args = parser.parse_args()
+
+    layer_dir = args.layers / ".cds" / LAYER
+    shutil.rmtree(layer_dir.parent, ignore_errors=True)
+    layer_dir.mkdir(parents=True)
+
+    start = time.perf_counter()
+    try:
+        base_image = resolve_base_image(args.base_image)
+        print(f"🐳 base image: {base_image}", flush=True)
+        trained = train(args.layers, args.dockerfile, base_image, args.env, args.timeout, layer_dir)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"⚠️  训练失败: {e}")
+        trained = False
+
+    if trained:
+        (layer_dir / BASE_IMAGE_FILE).write_text(base_image + "\n", encoding="utf-8")
+        size = (layer_dir / ARCHIVE).stat().st_size
+        print(f"✅ {ARCHIVE}: {size / 1024 / 1024:.1f} MB（训练 {time.perf_counter() - start:.1f}s）")
+    else:
+        for path in layer_dir.iterdir():
+            path.unlink()
+        print("⚠️  未生成 CDS 归档，本次部署不使用 CDS")
+
+    layers = json.loads((args.layers / MANIFEST).read_text(encoding="utf-8"))
+    layers[LAYER] = pack_layer(layer_dir, args.layers)
+    write_manifest(args.layers, layers)
+    shutil.rmtree(layer_dir.parent)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+部署后的就绪探测（由 Clone-Bot 生成，随仓库分发，在应用服务器上运行）。
+
+按退避间隔轮询健康检查地址，直到返回 200 且 status 为 UP，或超过截止时间：
+- 就绪：打印启动耗时，退出码 0
+- 超时：执行 --rollback 命令（如有）并再次探测回滚后的服务，退出码 1
+
+用法：
+    python3 deploy_probe.py --url http://localhost:48080/actuator/health --timeout 180 \\
+        --rollback "rm -rf layers && mv layers.prev layers && docker compose up -d --build"
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_URL = "http://localhost:48080/actuator/health"
+DEFAULT_TIMEOUT = 180.0
+INITIAL_INTERVAL = 1.0
+MAX_INTERVAL = 5.0
+BACKOFF = 1.5
+REQUEST_TIMEOUT = 3.0
+
+
+def check(url: str) -> tuple[bool, str]:
+    """返回 (是否就绪, 状态描述)。"""
+    try:
+        with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as resp:
+            body = resp.read().decode("utf-8", errors="replace")
+            code = resp.status
+    except urllib.error.HTTPError as e:
+        return False, f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError) as e:
+        return False, str(getattr(e, "reason", e))
+
+    if code != 200:
+        return False, f"HTTP {code}"
+    try:
+        status = json.loads(body).get("status")
+    except (ValueError, AttributeError):
+        return True, "HTTP 200"  # 非 JSON 响应，只看状态码
+    return status == "UP", f"status={status}"
+
+
+def wait_healthy(url: str, timeout: float) -> float | None:
+    """轮询直到就绪，返回耗时秒数；超时返回 None。"""
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = INITIAL_INTERVAL
+    attempt = 0
+    while True:
+        attempt += 1
+        ok, detail = check(url)
+        elapsed = time.monotonic() - start
+        if ok:
+            return elapsed
+        print(f"⏳ [{elapsed:6.1f}s] #{attempt} not ready: {detail}", flush=True)
+        if time.monotonic() + interval > deadline:
+            return None
+        time.sleep(interval)
+        interval = min(interval * BACKOFF, MAX_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="部署后轮询健康检查直到就绪")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"健康检查地址（默认 {DEFAULT_URL}）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="截止时间（秒）")
+    parser.add_argument("--rollback", help="超时后执行的回滚命令（shell）")
+    args = parser.parse_args()
+
+    print(f"🏥 waiting for {args.url} (timeout {args.timeout:.0f}s)")
+    elapsed = wait_healthy(args.url, args.timeout)
+    if elapsed is not None:
+        print(f"✅ healthy after {elapsed:.1f}s")
+        return 0
+
+    print(f"❌ not healthy within {args.timeout:.0f}s")
+    if not args.rollback:
+        return 1
+
+    print(f"↩️  rolling back: {args.rollback}", flush=True)
+    if subprocess.run(args.rollback, shell=True).returncode != 0:
+        print("❌ rollback command failed")
+        return 1
+    elapsed = wait_healthy(args.url, args.timeout)
+    if elapsed is None:
+        print("❌ previous version is not healthy either")
+    else:
+        print(f"✅ previous version healthy after {elapsed:.1f}s (deploy still failed)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
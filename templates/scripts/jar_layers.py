@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Spring Boot 分层部署（由 Clone-Bot 生成，随仓库分发）。
+
+extract：用 tools jarmode（Spring Boot 3.3+）把 fat jar 拆成 dependencies / spring-boot-loader /
+         snapshot-dependencies / application 四层，每层打成一个 tar，
+         并把每层内容的摘要写入 layers.json。application 层是只含本项目类的 future-server.jar
+         （Class-Path 指向 lib/），可以直接 java -jar：类由内置的 app class loader 从 jar 加载，
+         AppCDS 才能归档（见 cds_archive.py）
+diff：   对比本地与服务器上的 layers.json，输出需要上传的文件（摘要变化的层 + layers.json）
+
+用法：
+    python3 .github/scripts/jar_layers.py extract apps/future-server/target/future-server.jar dist/layers
+    python3 .github/scripts/jar_layers.py diff dist/layers remote-layers.json --github-output
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+from pathlib import Path
+
+MANIFEST = "layers.json"
+CHUNK = 1 << 20
+
+# Dockerfile 按固定层名 COPY，空层也要有目录
+LAYERS = ("dependencies", "spring-boot-loader", "snapshot-dependencies", "application")
+
+
+def layer_digest(layer_dir: Path) -> str:
+    """按相对路径排序，对路径和文件内容做摘要；与时间戳、打包顺序无关。"""
+    digest = hashlib.sha256()
+    for path in sorted(p for p in layer_dir.rglob("*") if p.is_file()):
+        digest.update(path.relative_to(layer_dir).as_posix().encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def reset_tarinfo(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    info.mtime = 0
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def pack_layer(layer_dir: Path, out: Path) -> str:
+    """把 layer_dir 打成 out/<层名>.tar（mtime 归零），返回内容摘要。"""
+    with tarfile.open(out / f"{layer_dir.name}.tar", "w") as tar:
+        for path in sorted(layer_dir.rglob("*")):
+            tar.add(path, arcname=path.relative_to(layer_dir).as_posix(),
+                    recursive=False, filter=reset_tarinfo)
+    return layer_digest(layer_dir)
+
+
+def write_manifest(out: Path, layers: dict[str, str]):
+    (out / MANIFEST).write_text(json.dumps(layers, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def extract(jar: Path, out: Path) -> dict[str, str]:
+    work = out / ".extract"
+    shutil.rmtree(work, ignore_errors=True)
+    subprocess.run(
+        ["java", "-Djarmode=tools", "-jar", str(jar.resolve()), "extract", "--layers", "--destination", str(work)],
+        check=True,
+    )
+
+    layers = {}
+    for name in LAYERS:
+        (work / name).mkdir(parents=True, exist_ok=True)
+    for layer_dir in sorted(p for p in work.iterdir() if p.is_dir()):
+        layers[layer_dir.name] = pack_layer(layer_dir, out)
+    shutil.rmtree(work)
+
+    write_manifest(out, layers)
+    return layers
+
+
+def changed_layers(local: dict[str, str], remote: dict[str, str]) -> list[str]:
+    return [name for name, digest in local.items() if remote.get(name) != digest]
+
+
+def load_remote(path: Path) -> dict[str, str]:
+    """服务器上没有 layers.json（首次部署，远端输出 {}）时为空；内容无法解析时也视为空，但要警告，因为会全量上传。"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  无法解析服务器上的 layers.json（{path}）: {e}，将上传全部层")
+        return {}
+    if not isinstance(data, dict):
+        print(f"⚠️  服务器上的 layers.json 不是对象（{path}），将上传全部层")
+        return {}
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spring Boot 分层打包 / 增量上传")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_extract = sub.add_parser("extract", help="拆分 jar 并生成 layers.json")
+    p_extract.add_argument("jar", type=Path)
+    p_extract.add_argument("out", type=Path)
+    p_diff = sub.add_parser("diff", help="对比服务器上的 layers.json")
+    p_diff.add_argument("layers", type=Path, help="extract 的输出目录")
+    p_diff.add_argument("remote", type=Path, help="服务器上的 layers.json")
+    p_diff.add_argument("--github-output", action="store_true", help="结果写入 $GITHUB_OUTPUT")
+    args = parser.parse_args()
+
+    if args.command == "extract":
+        args.out.mkdir(parents=True, exist_ok=True)
+        layers = extract(args.jar, args.out)
+        for name, digest in layers.items():
+            size = (args.out / f"{name}.tar").stat().st_size
+            print(f"📦 {name:<24} {size / 1024 / 1024:8.1f} MB  {digest[:12]}")
+        return 0
+
+    local = json.loads((args.layers / MANIFEST).read_text(encoding="utf-8"))
+    changed = changed_layers(local, load_remote(args.remote))
+    files = [str(args.layers / f"{name}.tar") for name in changed] + [str(args.layers / MANIFEST)]
+    total = sum((args.layers / f"{name}.tar").stat().st_size for name in changed)
+    for name in local:
+        print(f"   {'⬆️ ' if name in changed else '✅'} {name}")
+    print(f"📤 upload {len(changed)}/{len(local)} layers, {total / 1024 / 1024:.1f} MB")
+
+    if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"changed={','.join(changed)}\n")
+            f.write(f"files={','.join(files)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+计算 reactor 中“影响依赖下载”部分的指纹，作为 Maven 本地仓库缓存的 key（由 Clone-Bot 生成，随仓库分发）。
+
+参与指纹的内容：
+- reactor 外部的 <dependency>（含 dependencyManagement / BOM import、exclusions、scope）
+- <plugin> 的坐标与插件自身的依赖
+- reactor 外部的 <parent>
+- 以上内容中引用的 ${property} 按所在模块的 parent 链替换为实际值
+
+不参与指纹的内容：<module> 列表、模块间依赖、目录结构、描述信息等，
+所以调整模块布局、改名、增删内部模块都不会让缓存失效。
+
+用法：
+    python3 .github/scripts/pom_fingerprint.py                 # 输出指纹
+    python3 .github/scripts/pom_fingerprint.py --show          # 同时列出参与计算的条目
+    python3 .github/scripts/pom_fingerprint.py --github-output # 写入 $GITHUB_OUTPUT: key=...
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+from build_plan import RE_AID, RE_COMMENT, RE_DEP, RE_PARENT, load_reactor
+
+RE_PLUGIN = re.compile(r"<plugin>\s*.*?</plugin>", re.DOTALL)
+RE_PROPERTIES = re.compile(r"<properties>(.*?)</properties>", re.DOTALL)
+RE_PROPERTY = re.compile(r"<([\w.\-]+)>\s*([^<]*?)\s*</\1>")
+RE_PLACEHOLDER = re.compile(r"\$\{([\w.\-]+)\}")
+RE_GROUP = re.compile(r"<groupId>\s*([^<]+?)\s*</groupId>")
+RE_VERSION = re.compile(r"<version>\s*([^<]+?)\s*</version>")
+# 插件坐标之后的这些段落不参与插件自身坐标的解析
+RE_PLUGIN_BODY = re.compile(r"<(?:configuration|executions|dependencies)>.*?</(?:configuration|executions|dependencies)>", re.DOTALL)
+RE_TAG_GAP = re.compile(r">\s+<")
+RE_SPACE = re.compile(r"\s+")
+
+
+def own_properties(xml: str) -> dict[str, str]:
+    props: dict[str, str] = {}
+    for block in RE_PROPERTIES.findall(xml):
+        props.update(RE_PROPERTY.findall(block))
+    return props
+
+
+def module_properties(xmls: dict[str, str], parents: dict[str, str | None]) -> dict[str, dict[str, str]]:
+    """
+    每个模块可见的属性：沿 reactor 内的 <parent> 链继承，子模块的同名属性覆盖父模块（与 Maven 一致）。
+    按模块分别解析，兄弟模块定义的同名属性不会互相覆盖。
+    """
+    resolved: dict[str, dict[str, str]] = {}
+
+    def visit(aid: str, path: frozenset[str]) -> dict[str, str]:
+        if aid not in resolved:
+            parent = parents[aid]
+            inherited = visit(parent, path | {aid}) if parent in xmls and parent not in path else {}
+            resolved[aid] = {**inherited, **own_properties(xmls[aid])}
+        return resolved[aid]
+
+    for aid in xmls:
+        visit(aid, frozenset())
+    return resolved
+
+
+def resolve(text: str, props: dict[str, str]) -> str:
+    # 最多展开几层，防止属性互相引用导致死循环
+    for _ in range(5):
+        new = RE_PLACEHOLDER.sub(lambda m: props.get(m.group(1), m.group(0)), text)
+        if new == text:
+            break
+        text = new
+    return text
+
+
+def canonical(block: str, props: dict[str, str]) -> str:
+    """去掉标签间空白、压缩其余空白并展开属性，格式调整不影响指纹。"""
+    return resolve(RE_SPACE.sub(" ", RE_TAG_GAP.sub("><", block.strip())), props)
+
+
+def fingerprint_entries(root: Path) -> list[str]:
+    modules = load_reactor(root)
+    internal = set(modules)
+    xmls = {aid: RE_COMMENT.sub("", (root / m.path / "pom.xml").read_text(encoding="utf-8"))
+            for aid, m in modules.items()}
+    props_of = module_properties(xmls, {aid: m.parent for aid, m in modules.items()})
+
+    entries = set()
+    for aid, xml in xmls.items():
+        props = props_of[aid]
+        parent = RE_PARENT.search(xml)
+        if parent:
+            am = RE_AID.search(parent.group(0))
+            if am and am.group(1) not in internal:
+                entries.add("parent " + canonical(parent.group(0), props))
+            xml = xml[:parent.start()] + xml[parent.end():]
+
+        for plugin in RE_PLUGIN.findall(xml):
+            head = RE_PLUGIN_BODY.sub("", plugin)
+            gm, am, vm = RE_GROUP.search(head), RE_AID.search(head), RE_VERSION.search(head)
+            gav = ":".join([
+                gm.group(1) if gm else "org.apache.maven.plugins",
+                am.group(1) if am else "?",
+                vm.group(1) if vm else "",
+            ])
+            entries.add("plugin " + resolve(gav, props))
+
+        # 插件自身的 <dependency> 也会被这里匹配到，同样需要下载
+        for dep in RE_DEP.findall(xml):
+            am = RE_AID.search(dep)
+            if am and am.group(1) in internal:
+                continue
+            entries.add("dependency " + canonical(dep, props))
+
+    return sorted(entries)
+
+
+def fingerprint(entries: list[str]) -> str:
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(entry.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:32]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计算 Maven 依赖缓存指纹")
+    parser.add_argument("--show", action="store_true", help="列出参与指纹计算的条目")
+    parser.add_argument("--github-output", action="store_true", help="结果写入 $GITHUB_OUTPUT")
+    args = parser.parse_args()
+
+    if not Path("pom.xml").exists():
+        print("❌ Run this script at repo root (pom.xml not found).")
+        return 1
+
+    entries = fingerprint_entries(Path("."))
+    key = fingerprint(entries)
+    if args.show:
+        for entry in entries:
+            print(f"   {entry}")
+    print(f"🔑 pom fingerprint: {key} ({len(entries)} entries)")
+
+    if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"key={key}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# tools/ 与 templates/scripts/ 都是平铺的脚本，按运行时的方式把目录放进 sys.path
+for path in (ROOT / "tools", ROOT / "templates" / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
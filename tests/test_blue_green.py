@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import json
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import blue_green
+import deploy_probe
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def healthy():
+    """假的健康检查：GET /<color> 对 healthy 集合里的颜色返回 UP。"""
+    colors: set[str] = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            up = self.path.strip("/") in colors
+            body = json.dumps({"status": "UP" if up else "DOWN"}).encode()
+            self.send_response(200 if up else 503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield colors, server.server_port
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def deploy(tmp_path, healthy, monkeypatch):
+    """用 echo 代替 docker compose：每条命令往 commands.log 记一行，返回 (执行一次部署, 读取日志)。"""
+    colors, health_port = healthy
+    monkeypatch.setattr(blue_green, "COLORS", {"blue": free_port(), "green": free_port()})
+    monkeypatch.setattr(deploy_probe, "INITIAL_INTERVAL", 0.05)
+    monkeypatch.setattr(deploy_probe, "MAX_INTERVAL", 0.1)
+    log = tmp_path / "commands.log"
+
+    def run(*extra: str) -> int:
+        monkeypatch.setattr(sys, "argv", [
+            "blue_green.py", "deploy", "--dir", str(tmp_path),
+            "--start", "echo start {color} >> commands.log",
+            "--stop", "echo stop {color} >> commands.log",
+            "--logs", "echo logs {color} >> commands.log",
+            "--reload", "echo reload {color} >> commands.log",
+            "--legacy-stop", "echo legacy-stop >> commands.log",
+            "--legacy-start", "echo legacy-start >> commands.log",
+            "--health-url", f"http://127.0.0.1:{health_port}/{{color}}",
+            "--proxy-url", "", "--timeout", "0.5", "--drain", "0",
+            *extra,
+        ])
+        log.unlink(missing_ok=True)
+        return blue_green.main()
+
+    def commands() -> list[str]:
+        return log.read_text().splitlines() if log.exists() else []
+
+    return run, commands, colors
+
+
+def active(root) -> str | None:
+    state = blue_green.load_state(root)
+    return state and state["active"]
+
+
+def upstream_port(root) -> int:
+    return int((root / blue_green.UPSTREAM_FILE).read_text().split(":")[1].rstrip(";\n"))
+
+
+def test_first_deploy_replaces_legacy_then_switches_colors(deploy, tmp_path):
+    run, commands, colors = deploy
+    colors.update({"blue", "green"})
+
+    assert run() == 0
+    assert active(tmp_path) == "blue"
+    assert upstream_port(tmp_path) == blue_green.COLORS["blue"]
+    assert commands() == ["stop blue", "start blue", "legacy-stop", "reload blue"]
+
+    assert run() == 0
+    assert active(tmp_path) == "green"
+    assert upstream_port(tmp_path) == blue_green.COLORS["green"]
+    assert commands() == ["stop green", "start green", "reload green", "stop blue"]
+
+
+def test_unhealthy_new_color_is_discarded_and_proxy_untouched(deploy, tmp_path):
+    run, commands, colors = deploy
+    colors.add("blue")
+    assert run() == 0
+
+    assert run() == 1
+    assert active(tmp_path) == "blue"
+    assert upstream_port(tmp_path) == blue_green.COLORS["blue"]
+    assert commands() == ["stop green", "start green", "logs green", "stop green"]
+
+
+def test_failed_reload_restores_upstream(deploy, tmp_path):
+    run, commands, colors = deploy
+    colors.update({"blue", "green"})
+    assert run() == 0
+
+    assert run("--reload", "echo reload {color} >> commands.log && test {color} = blue") == 1
+    assert active(tmp_path) == "blue"
+    assert upstream_port(tmp_path) == blue_green.COLORS["blue"]
+    assert commands() == ["stop green", "start green", "reload green", "reload blue", "logs green", "stop green"]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import base64
+
+import pytest
+from nacl import public
+
+import copy_secrets
+
+
+class FakeResponse:
+    def __init__(self, data=None, status_code=200):
+        self.data, self.status_code = data, status_code
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def github(monkeypatch):
+    """记录所有请求；secrets: 名 -> visibility，selected: 名 -> 已挂载的仓库 id。"""
+    state = {"calls": [], "secrets": {}, "selected": {}}
+    key = base64.b64encode(bytes(public.PrivateKey.generate().public_key)).decode()
+
+    def get(url, params=None, **_):
+        state["calls"].append(("GET", url, None))
+        if url.endswith("/actions/secrets/public-key"):
+            return FakeResponse({"key_id": "k1", "key": key})
+        if url.endswith("/actions/secrets"):
+            return FakeResponse({"secrets": [{"name": n, "visibility": v} for n, v in state["secrets"].items()]})
+        name = url.split("/")[-2]
+        return FakeResponse({"repositories": [{"id": i} for i in state["selected"].get(name, ())]})
+
+    def put(url, json=None, **_):
+        state["calls"].append(("PUT", url, json))
+        return FakeResponse(status_code=204)
+
+    monkeypatch.setattr(copy_secrets.requests, "get", get)
+    monkeypatch.setattr(copy_secrets.requests, "put", put)
+    return state
+
+
+def test_single_repo_attach_is_one_put_per_secret(github):
+    github["secrets"] = {"DB_HOST": "selected", "SSH_KEY": "selected"}
+    github["selected"] = {"DB_HOST": [1], "SSH_KEY": [1]}
+    copy_secrets.provision_org_secrets("acme", "t", {"DB_HOST": "db", "SSH_KEY": "k"}, {42})
+    # 除了列出组织级 secrets，不读已挂载列表，也不整体替换
+    assert github["calls"][1:] == [
+        ("PUT", f"{copy_secrets.GITHUB_API}/orgs/acme/actions/secrets/DB_HOST/repositories/42", None),
+        ("PUT", f"{copy_secrets.GITHUB_API}/orgs/acme/actions/secrets/SSH_KEY/repositories/42", None),
+    ]
+
+
+def test_batch_attach_merges_existing_selection(github):
+    github["secrets"] = {"DB_HOST": "selected"}
+    github["selected"] = {"DB_HOST": [1]}
+    copy_secrets.provision_org_secrets("acme", "t", {"DB_HOST": "db"}, {42, 43})
+    method, url, body = github["calls"][-1]
+    assert (method, url) == ("PUT", f"{copy_secrets.GITHUB_API}/orgs/acme/actions/secrets/DB_HOST/repositories")
+    assert body == {"selected_repository_ids": [1, 42, 43]}
+
+
+def test_rotate_keeps_visibility_of_shared_secrets(github):
+    github["secrets"] = {"DB_PASSWORD": "all", "REDIS_PASSWORD": "private"}
+    values = {"DB_PASSWORD": "new", "REDIS_PASSWORD": "new"}
+
+    copy_secrets.provision_org_secrets("acme", "t", values, {42})
+    assert not [c for c in github["calls"] if c[0] == "PUT"]
+
+    copy_secrets.provision_org_secrets("acme", "t", values, {42}, rotate=True)
+    puts = {url.rsplit("/", 1)[-1]: body for method, url, body in github["calls"] if method == "PUT"}
+    assert puts["DB_PASSWORD"]["visibility"] == "all"
+    assert puts["REDIS_PASSWORD"]["visibility"] == "private"
+    assert all(body["encrypted_value"] and "selected_repository_ids" not in body for body in puts.values())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import deploy_probe
+
+
+@pytest.fixture
+def health():
+    """本地假的 /actuator/health：修改 state["code"] / state["status"] 控制响应。"""
+    state = {"code": 503, "status": "DOWN"}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps({"status": state["status"]}).encode()
+            self.send_response(state["code"])
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/actuator/health"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(deploy_probe, "INITIAL_INTERVAL", 0.05)
+    monkeypatch.setattr(deploy_probe, "MAX_INTERVAL", 0.1)
+
+
+def test_check_requires_status_up(health):
+    assert deploy_probe.check(health["url"]) == (False, "HTTP 503")
+    health.update(code=200, status="DOWN")
+    assert deploy_probe.check(health["url"]) == (False, "status=DOWN")
+    health.update(status="UP")
+    assert deploy_probe.check(health["url"]) == (True, "status=UP")
+
+
+def test_check_connection_refused():
+    ok, _ = deploy_probe.check("http://127.0.0.1:9/actuator/health")
+    assert not ok
+
+
+def test_wait_healthy_returns_once_up(health):
+    timer = threading.Timer(0.3, health.update, kwargs={"code": 200, "status": "UP"})
+    timer.start()
+    elapsed = deploy_probe.wait_healthy(health["url"], timeout=5)
+    timer.join()
+    assert elapsed is not None and elapsed >= 0.3
+
+
+def test_wait_healthy_times_out(health):
+    assert deploy_probe.wait_healthy(health["url"], timeout=0.3) is None
+
+
+def test_main_rolls_back_on_timeout(health, tmp_path, monkeypatch):
+    marker = tmp_path / "rolled-back"
+    monkeypatch.setattr(sys, "argv", ["deploy_probe.py", "--url", health["url"], "--timeout", "0.3",
+                                      "--rollback", f"touch {marker}"])
+    assert deploy_probe.main() == 1
+    assert marker.exists()
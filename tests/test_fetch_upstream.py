@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import fetch_upstream
+from module_profile import parse_profile
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+
+BRANCH = "master-jdk17"
+
+FILES = {
+    "pom.xml": "<project><artifactId>yudao</artifactId></project>\n",
+    "Readme.md": "readme\n",
+    "yudao-ui/admin/index.html": "<html/>\n",
+    "sql/mysql/ruoyi-vue-pro.sql": "select 1;\n",
+    "yudao-module-system/pom.xml": "<project><artifactId>yudao-module-system</artifactId></project>\n",
+    "yudao-module-system/src/main/java/System.java": "class System {}\n",
+    "yudao-module-iot/pom.xml": "<project><artifactId>yudao-module-iot</artifactId></project>\n",
+    "yudao-module-iot/yudao-module-iot-biz/pom.xml": "<project><artifactId>yudao-module-iot-biz</artifactId></project>\n",
+    "yudao-module-iot/yudao-module-iot-biz/src/main/java/Iot.java": "class Iot {}\n",
+}
+
+
+@pytest.fixture
+def upstream(tmp_path) -> str:
+    """file:// 的本地上游仓库（允许 --filter，与 GitHub 一致）。"""
+    repo = tmp_path / "upstream"
+    for rel, text in FILES.items():
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text(text, encoding="utf-8")
+
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=repo, check=True,
+                       capture_output=True)
+
+    git("init", "-q", "-b", BRANCH)
+    git("config", "uploadpack.allowFilter", "true")
+    git("add", ".")
+    git("commit", "-q", "-m", "init")
+    return repo.as_uri()
+
+
+def tree(root: Path) -> set[str]:
+    return {p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file()}
+
+
+def test_sparse_fetch_keeps_pom_skeleton_of_excluded_modules(upstream, tmp_path):
+    dest = tmp_path / "repo_content"
+    summary = fetch_upstream.fetch(upstream, BRANCH, dest, parse_profile("no-iot", {"exclude": ["iot"]}))
+
+    assert summary.startswith("blobless sparse")
+    assert tree(dest) == {
+        "pom.xml",
+        "yudao-module-system/pom.xml",
+        "yudao-module-system/src/main/java/System.java",
+        "yudao-module-iot/pom.xml",
+        "yudao-module-iot/yudao-module-iot-biz/pom.xml",
+    }
+
+
+def test_fetch_without_profile_drops_only_upstream_excludes(upstream, tmp_path):
+    dest = tmp_path / "repo_content"
+    fetch_upstream.fetch(upstream, BRANCH, dest)
+
+    assert not (dest / ".git").exists()
+    assert tree(dest) == {rel for rel in FILES if rel.split("/")[0] not in fetch_upstream.UPSTREAM_EXCLUDES}
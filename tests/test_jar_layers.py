@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+import jar_layers
+
+
+def test_load_remote_reads_manifest(tmp_path):
+    remote = tmp_path / "remote-layers.json"
+    remote.write_text('{"dependencies": "abc"}', encoding="utf-8")
+    assert jar_layers.load_remote(remote) == {"dependencies": "abc"}
+
+
+def test_load_remote_warns_on_garbage(tmp_path, capsys):
+    # 没截到标记行时拿到的是空文件或 banner，应当提示会全量上传，而不是悄悄当成首次部署
+    remote = tmp_path / "remote-layers.json"
+    remote.write_text("Welcome to Ubuntu\n{}", encoding="utf-8")
+    assert jar_layers.load_remote(remote) == {}
+    assert "⚠️" in capsys.readouterr().out
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import patch_application_local as pal
+
+# 上游 application-local.yaml 中 Redis 段的原文
+UPSTREAM_REDIS = """spring:
+  # Redis 配置。Redisson 默认的配置足够使用，一般不需要进行调优
+  redis:
+    host: 127.0.0.1 # 地址
+    port: 6379 # 端口
+    database: 0 # 数据库索引
+#      password: dev # 密码，建议生产环境开启
+
+server:
+  port: 48080
+"""
+
+
+def indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def test_redis_keys_move_under_spring_data_redis(tmp_path):
+    path = tmp_path / "apps" / "future-server" / "src" / "main" / "resources" / "application-local.yaml"
+    path.parent.mkdir(parents=True)
+    path.write_text(UPSTREAM_REDIS, encoding="utf-8")
+
+    rules = [r for r in pal.load_rules(pal.RULES_FILE) if r.name.startswith("redis-")]
+    results = pal.patch_all(tmp_path, rules)
+    assert pal.report(rules, results) == []
+
+    # server: 之前的部分（server 下也有 port）
+    lines = path.read_text(encoding="utf-8").split("\nserver:")[0].splitlines()
+    keys = {ln.strip().split(":")[0]: ln for ln in lines if ln.strip() and not ln.lstrip().startswith("#")}
+    assert indent(keys["data"]) == 2 and indent(keys["redis"]) == 4
+    # password 与 host / port / database 同级；多缩进一层会成为 database 标量的子键，yaml 无法解析
+    assert {indent(keys[k]) for k in ("host", "port", "database", "password")} == {6}
+    assert keys["password"].strip().startswith("password: ${REDIS_PASSWORD}")
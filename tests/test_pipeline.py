@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import io
+import threading
+
+from pipeline import Stage, run_pipeline
+from staging import write_text
+
+
+def concurrent_stages(writes_of_a: list[str], writes_of_b: list[str]) -> list[Stage]:
+    """a / b 两个互不冲突的阶段，用 barrier 保证运行时间完全重叠。"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def writer(rels: list[str]):
+        def run(root, env):
+            barrier.wait()
+            for rel in rels:
+                (root / rel).parent.mkdir(parents=True, exist_ok=True)
+                write_text(root / rel, rel)
+            barrier.wait()
+            return ""
+        return run
+
+    return [
+        Stage("a", writer(writes_of_a), reads=(), writes=("a/**",)),
+        Stage("b", writer(writes_of_b), reads=(), writes=("b/**",)),
+    ]
+
+
+def test_concurrent_writes_inside_own_sets_pass(tmp_path):
+    out = io.StringIO()
+    assert run_pipeline(tmp_path, concurrent_stages(["a/1.txt"], ["b/1.txt"]), env={}, jobs=2, out=out)
+    assert "outside declared set" not in out.getvalue()
+
+
+def test_write_into_concurrent_stage_set_is_reported(tmp_path):
+    out = io.StringIO()
+    ok = run_pipeline(tmp_path, concurrent_stages(["a/1.txt", "b/from-a.txt"], ["b/1.txt"]), env={}, jobs=2, out=out)
+
+    report = out.getvalue()
+    assert not ok
+    assert "❌ a: wrote outside declared set: b/from-a.txt" in report
+    assert "(concurrent with: b)" in report
+    assert "❌ b:" not in report
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import pytest
+
+import restructure_layout
+
+
+def pom(path: Path, artifact_id: str, modules: tuple[str, ...] = ()):
+    path.mkdir(parents=True, exist_ok=True)
+    entries = "".join(f"<module>{m}</module>" for m in modules)
+    (path / "pom.xml").write_text(
+        f"<project><artifactId>{artifact_id}</artifactId><modules>{entries}</modules></project>\n", encoding="utf-8")
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = Path(".")
+    pom(root, "future", ("modules",))
+    pom(root / "modules", "future-modules", ("extend",))
+    pom(root / "modules" / "extend", "future-modules-extend", ("pay",))
+    pom(root / "modules" / "extend" / "pay", "future-extend-pay")
+    return root
+
+
+def test_orphan_poms_finds_unaggregated_nested_module(tree):
+    # ENABLE_IOT_IN_AGGREGATOR 关闭时 iot 不在 extend 聚合里：中间目录 iot/ 没有 pom.xml
+    pom(tree / "modules" / "extend" / "iot" / "future-module-iot", "future-module-iot")
+    reactor, missing = restructure_layout.reactor_poms(restructure_layout.ROOT_POM)
+
+    assert missing == []
+    assert restructure_layout.orphan_poms(tree, reactor) == [
+        Path("modules/extend/iot/future-module-iot/pom.xml")]
+
+
+def test_orphan_poms_stops_at_first_pom_and_skips_sources(tree):
+    # 孤立模块下面的子模块不再单独报告；src/ 里的 pom.xml（资源文件）不算
+    pom(tree / "legacy", "legacy")
+    pom(tree / "legacy" / "child", "legacy-child")
+    pom(tree / "modules" / "extend" / "pay" / "src" / "main" / "resources", "resource")
+    reactor, _ = restructure_layout.reactor_poms(restructure_layout.ROOT_POM)
+
+    assert restructure_layout.orphan_poms(tree, reactor) == [Path("legacy/pom.xml")]
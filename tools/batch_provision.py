@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按清单（manifest）批量创建目标仓库。
+
+上游只 clone 一次，与目标无关的转换（replace_all / uncomment_maven）也只跑一次；
+之后每个目标以硬链接树的形式暂存一份上游副本（见 staging.py，写时才真正复制），
+按自己的模块配置与替换词完成剩余转换，
+再创建仓库、推送、复制 secrets。目标之间并发执行，并发度有上限。
+
+用法（在 Clone-Bot 仓库根目录）：
+    python3 tools/batch_provision.py manifests/clients.json
+    python3 tools/batch_provision.py manifests/clients.json --local-only   # 只做转换，不建仓库
+    python3 tools/batch_provision.py manifests/clients.json --resume       # 从上次中断处继续
+
+每个目标的进度记在 <work>/targets/<name>.state/（见 checkpoint.py）：暂存、每个转换阶段、
+创建仓库、推送、每个 secret 完成后各写一次检查点，--resume 跳过输入未变的已完成步骤。
+
+SECRETS_SCOPE=org 且 OWNER 是组织时，secrets 不再逐仓库复制：全部目标完成后
+一次性建好 / 更新组织级 secrets，并把成功的仓库批量挂到 selected-repositories 上（见 copy_secrets.py）。
+"""
+
+import argparse
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+
+import profiling
+from checkpoint import STATE_ENV, Checkpoint, CheckpointMismatch, digest, toolchain_digest, tree_manifest
+from copy_secrets import (GITHUB_API, SECRETS_ROTATE_ENV, SECRETS_SCOPE_ENV, RepoConfig, get_repo_id, make_headers,
+                          owner_is_org, provision_org_secrets, secret_values)
+from fetch_upstream import UPSTREAM_BRANCH, UPSTREAM_URL, fetch
+from module_profile import load_profile
+from patch_application_local import NO_RUNTIME_PROFILE, load_runtime_profile
+from pipeline import STAGES, Stage, run_pipeline, tool
+from replace_all import REPLACEMENTS
+from staging import link_tree
+from tracing import span
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+# 与目标无关的转换：在共享的上游副本上只跑一次
+SHARED_STAGES = {"replace_all", "uncomment_maven"}
+
+# 目标自己的替换词（REPLACE_TOKENS）放在写阶段的最后（补丁规则匹配的是默认替换后的文本），
+# 但在 validate_tree 之前：不变量检查的必须是最终要推送的树
+TARGET_REPLACE_STAGE = Stage("replace_target", tool("replace_all.py"), reads=("**",), writes=("**",))
+
+DEFAULT_CONCURRENCY = 4
+INITIAL_COMMIT_MESSAGE = "Initial commit: 梦开始的地方"
+
+
+class Target(NamedTuple):
+    name: str
+    description: str
+    private: bool
+    module_profile: str
+    replacements: dict[str, str]
+    runtime_profile: str = NO_RUNTIME_PROFILE
+
+
+class TargetResult(NamedTuple):
+    name: str
+    ok: bool
+    failed_stage: str | None
+    error: str | None
+    durations: dict[str, float]
+
+
+class Publisher(NamedTuple):
+    owner: str
+    token: str
+    org: bool = False          # owner 是组织：仓库建在 /orgs/{owner}/repos 下，而不是 token 用户名下
+    org_secrets: bool = False  # secrets 在组织级别统一提供，目标完成后由调用方批量挂载
+
+
+# ---------- manifest ----------
+def parse_target(item: dict) -> Target:
+    target = Target(
+        name=item["name"],
+        description=item.get("description", ""),
+        private=bool(item.get("private", False)),
+        module_profile=item.get("module_profile", "full"),
+        replacements=item.get("replacements", {}),
+        runtime_profile=item.get("runtime_profile", NO_RUNTIME_PROFILE),
+    )
+    # 默认替换表决定了 future-* 目录结构，后续工具依赖它，不允许按目标覆盖
+    clashes = sorted(set(target.replacements) & set(REPLACEMENTS))
+    if clashes:
+        raise ValueError(f"{target.name}: 不能覆盖默认替换词 {', '.join(clashes)}")
+    load_profile(target.module_profile)  # 提前校验模块配置
+    load_runtime_profile(target.runtime_profile)
+    return target
+
+
+def load_manifest(path: Path) -> tuple[list[Target], int]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    targets, seen = [], set()
+    for item in data["targets"]:
+        target = parse_target(item)
+        if target.name in seen:
+            raise ValueError(f"目标仓库名重复: {target.name}")
+        seen.add(target.name)
+        targets.append(target)
+    return targets, int(data.get("concurrency", DEFAULT_CONCURRENCY))
+
+
+# ---------- 进程 / git ----------
+def run_tool(script: str, cwd: Path, log, env: dict[str, str] | None = None):
+    log.write(f"\n===== {script} =====\n")
+    log.flush()
+    subprocess.run(
+        [sys.executable, str(TOOLS_DIR / script)],
+        cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT, check=True,
+    )
+
+
+def run_git(args: list[str], cwd: Path, log):
+    log.flush()
+    subprocess.run(["git", *args], cwd=cwd, stdout=log, stderr=subprocess.STDOUT, check=True)
+
+
+def prepare_upstream(work: Path, upstream_url: str, branch: str, name: str = "upstream",
+                     resume: bool = False) -> Path:
+    """获取上游（不含无用路径，见 fetch_upstream）、跑一次与目标无关的转换，结果放在 work/<name>。
+
+    共享副本供所有目标使用，因此不按模块配置排除，模块由各目标自己裁剪。
+    resume 时若上次已完成且副本未被改动，直接复用。
+    """
+    upstream = work / name
+    ckpt = Checkpoint(work / f"{name}.state")
+    key = digest(upstream_url, branch, toolchain_digest())
+    if resume and upstream.exists() and ckpt.done("clone", key) and tree_manifest(upstream) == ckpt.tree:
+        print(f"⏭️  {name}: 复用上次准备好的上游副本（检查点）")
+        return upstream
+
+    ckpt.reset()
+    with open(work / "logs" / f"{name}.log", "w", encoding="utf-8") as log:
+        with span("fetch", cat="git", url=upstream_url, branch=branch):
+            log.write(f"📥 {fetch(upstream_url, branch, upstream)}\n")
+        stages = [s for s in STAGES if s.name in SHARED_STAGES]
+        with span("shared pipeline", cat="pipeline"):
+            if not run_pipeline(upstream, stages, out=log):
+                raise RuntimeError("共享转换失败")
+    ckpt.start_tree(tree_manifest(upstream), [])
+    ckpt.record("clone", key)
+    return upstream
+
+
+# ---------- GitHub ----------
+def delete_repo_if_exists(pub: Publisher, name: str):
+    url = f"{GITHUB_API}/repos/{pub.owner}/{name}"
+    resp = requests.get(url, headers=make_headers(pub.token), timeout=10)
+    if resp.status_code == 200:
+        requests.delete(url, headers=make_headers(pub.token), timeout=10).raise_for_status()
+        time.sleep(3)
+
+
+def create_repo(pub: Publisher, target: Target):
+    resp = requests.post(
+        f"{GITHUB_API}/orgs/{pub.owner}/repos" if pub.org else f"{GITHUB_API}/user/repos",
+        json={"name": target.name, "description": target.description, "private": target.private},
+        headers=make_headers(pub.token),
+        timeout=10,
+    )
+    if "full_name" not in resp.json():
+        raise RuntimeError(f"创建仓库失败: {resp.text}")
+    time.sleep(3)
+
+    try:
+        requests.patch(
+            f"{GITHUB_API}/repos/{pub.owner}/{target.name}",
+            json={"security_and_analysis": {
+                "secret_scanning": {"status": "enabled"},
+                "secret_scanning_push_protection": {"status": "disabled"},
+            }},
+            headers=make_headers(pub.token),
+            timeout=10,
+        )
+    except requests.RequestException:
+        pass
+
+
+def push_repo(pub: Publisher, name: str, repo_dir: Path, log):
+    # token 通过 extraheader 传入，不出现在 remote URL 和 git 的错误输出里
+    auth = base64.b64encode(f"x-access-token:{pub.token}".encode()).decode()
+    # 上次推送中断留下的 .git 直接丢弃，重新提交
+    if (repo_dir / ".git").exists():
+        shutil.rmtree(repo_dir / ".git")
+    run_git(["init", "-q"], repo_dir, log)
+    run_git(["config", "user.name", "github-actions[bot]"], repo_dir, log)
+    run_git(["config", "user.email", "41898282+github-actions[bot]@users.noreply.github.com"], repo_dir, log)
+    run_git(["add", "."], repo_dir, log)
+    run_git(["commit", "-q", "-m", INITIAL_COMMIT_MESSAGE], repo_dir, log)
+    run_git(["branch", "-M", "master"], repo_dir, log)
+    run_git(["remote", "add", "origin", f"https://github.com/{pub.owner}/{name}.git"], repo_dir, log)
+    run_git(["-c", f"http.extraheader=AUTHORIZATION: basic {auth}", "push", "-q", "-u", "origin", "master"],
+            repo_dir, log)
+
+
+def make_publisher(owner: str, token: str) -> Publisher:
+    """SECRETS_SCOPE=org 且 owner 确实是组织时使用组织级 secrets；个人账号回退为仓库级。"""
+    org = owner_is_org(owner, token)
+    if os.environ.get(SECRETS_SCOPE_ENV) != "org":
+        return Publisher(owner, token, org=org)
+    if org:
+        return Publisher(owner, token, org=True, org_secrets=True)
+    print(f"ℹ️  {owner} 是个人账号，没有组织级 secrets，回退为逐仓库复制")
+    return Publisher(owner, token)
+
+
+def attach_org_secrets(pub: Publisher, names: list[str]):
+    """为 names 对应的仓库一次性挂载全部组织级 secrets（单个仓库每个 secret 一次 PUT，多个仓库一次 GET + 至多一次 PUT）。"""
+    values, empty = secret_values()
+    for name in empty:
+        print(f"⚠️  跳过 {name}: 环境变量不存在或为空")
+    with span("org secrets", cat="github", repos=len(names)):
+        repo_ids = {get_repo_id(RepoConfig(pub.owner, n, pub.token)) for n in names}
+        provision_org_secrets(pub.owner, pub.token, values, repo_ids,
+                              rotate=os.environ.get(SECRETS_ROTATE_ENV, "").lower() == "true")
+
+
+# ---------- 单个目标 ----------
+def provision_target(target: Target, upstream: Path, work: Path, pub: Publisher | None,
+                     resume: bool = False) -> TargetResult:
+    repo_dir = work / "targets" / target.name
+    state = work / "targets" / f"{target.name}.state"
+    durations: dict[str, float] = {}
+    stage = "stage"
+
+    def timed(name: str, fn, *args):
+        nonlocal stage
+        stage = name
+        start = time.perf_counter()
+        with span(name, cat="target", target=target.name):
+            fn(*args)
+        durations[name] = round(time.perf_counter() - start, 2)
+
+    env = {**os.environ, "MODULE_PROFILE": target.module_profile, "RUNTIME_PROFILE": target.runtime_profile,
+           "NEW_REPO": target.name}
+    env.pop("REPLACE_TOKENS", None)
+    # 模块裁剪（prune_modules）声明在最前，其余阶段只会看到保留的模块
+    stages = [s for s in STAGES if s.name not in SHARED_STAGES]
+    if target.replacements:
+        env["REPLACE_TOKENS"] = json.dumps(target.replacements, sort_keys=True)
+        at = next((i for i, s in enumerate(stages) if s.name == "validate_tree"), len(stages))
+        stages.insert(at, TARGET_REPLACE_STAGE)
+    source = digest(tree_manifest(upstream))
+
+    def stage_fresh(log):
+        if repo_dir.exists():
+            shutil.rmtree(repo_dir)
+        Checkpoint(state).reset()
+        log.write(f"staged via {link_tree(upstream, repo_dir)}\n")
+        Checkpoint(state).record("stage", source)
+
+    def transform(log, resumed: bool):
+        try:
+            ok = run_pipeline(repo_dir, stages, env=env, out=log, state=state, resume=resumed)
+        except CheckpointMismatch as e:
+            log.write(f"⚠️  不能从检查点恢复（{e}），重新暂存\n")
+            stage_fresh(log)
+            ok = run_pipeline(repo_dir, stages, env=env, out=log, state=state)
+        if not ok:
+            raise RuntimeError("转换流水线失败")
+
+    def checkpointed(name: str, key: str, fn, *args):
+        if Checkpoint(state).done(name, key):
+            log.write(f"⏭️  {name}: 已完成（检查点）\n")
+            return
+        timed(name, fn, *args)
+        Checkpoint(state).record(name, key)
+
+    with open(work / "logs" / f"{target.name}.log", "a" if resume else "w", encoding="utf-8") as log:
+        try:
+            resumed = resume and repo_dir.exists() and Checkpoint(state).done("stage", source)
+            if resumed:
+                log.write("⏭️  stage: 已完成（检查点）\n")
+            else:
+                timed("stage", stage_fresh, log)
+            timed("transform", transform, log, resumed)
+            if pub is not None:
+                checkpointed("create", digest(target.name, target.description, target.private),
+                             lambda: (delete_repo_if_exists(pub, target.name), create_repo(pub, target)))
+                checkpointed("push", digest(Checkpoint(state).tree),
+                             push_repo, pub, target.name, repo_dir, log)
+                if pub.org_secrets:
+                    log.write("ℹ️  secrets: 组织级，全部目标完成后统一挂载\n")
+                else:
+                    # copy_secrets 按 secret 逐个记录检查点
+                    timed("secrets", run_tool, "copy_secrets.py", TOOLS_DIR, log,
+                          {**env, "OWNER": pub.owner, "GH_PAT": pub.token, STATE_ENV: str(state),
+                           SECRETS_SCOPE_ENV: "repo"})
+        except Exception as e:
+            log.write(f"\n❌ {stage} failed: {e}\n")
+            return TargetResult(target.name, False, stage, str(e), durations)
+
+    return TargetResult(target.name, True, None, None, durations)
+
+
+# ---------- 报告 ----------
+def print_report(results: list[TargetResult]):
+    print("\n📋 批量结果:")
+    for r in results:
+        timing = ", ".join(f"{k} {v}s" for k, v in r.durations.items())
+        if r.ok:
+            print(f"  ✅ {r.name}  ({timing})")
+        else:
+            print(f"  ❌ {r.name}  failed at {r.failed_stage}: {r.error}  ({timing})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按 manifest 批量创建并初始化仓库")
+    parser.add_argument("manifest", type=Path)
+    parser.add_argument("--work", type=Path, default=Path("batch_work"), help="工作目录")
+    parser.add_argument("--jobs", type=int, help="并发目标数（默认取 manifest 中的 concurrency）")
+    parser.add_argument("--upstream", default=UPSTREAM_URL, help="上游仓库 URL（可用 file:// 本地仓库）")
+    parser.add_argument("--branch", default=UPSTREAM_BRANCH)
+    parser.add_argument("--local-only", action="store_true", help="只做转换，不创建 / 推送 / 复制 secrets")
+    parser.add_argument("--resume", action="store_true", help="从检查点继续，跳过输入未变的已完成步骤")
+    args = parser.parse_args()
+
+    try:
+        targets, concurrency = load_manifest(args.manifest)
+    except (KeyError, ValueError) as e:
+        print(f"❌ manifest 无效: {e}")
+        return 1
+
+    pub = None
+    if not args.local_only:
+        missing = [v for v in ("GH_PAT", "OWNER") if not os.environ.get(v)]
+        if missing:
+            print(f"❌ 缺少必需的环境变量: {', '.join(missing)}")
+            return 1
+        try:
+            pub = make_publisher(os.environ["OWNER"], os.environ["GH_PAT"])
+        except requests.HTTPError as e:
+            print(f"❌ 查询 {os.environ['OWNER']} 失败: {e}")
+            return 1
+
+    work = args.work.resolve()
+    (work / "logs").mkdir(parents=True, exist_ok=True)
+    jobs = args.jobs or concurrency
+
+    print(f"🚀 批量处理 {len(targets)} 个目标（并发 {jobs}）")
+    print(f"📥 准备上游副本: {args.upstream} ({args.branch})")
+    try:
+        with span("prepare upstream", cat="batch"):
+            upstream = prepare_upstream(work, args.upstream, args.branch, resume=args.resume)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"❌ 上游准备失败: {e}（日志: {work / 'logs' / 'upstream.log'}）")
+        return 1
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda t: provision_target(t, upstream, work, pub, args.resume), targets))
+
+    done = [r.name for r in results if r.ok]
+    if pub is not None and pub.org_secrets and done:
+        print(f"🔐 组织级 secrets -> {len(done)} 个仓库")
+        try:
+            attach_org_secrets(pub, done)
+        except requests.HTTPError as e:
+            print(f"❌ 组织级 secrets 失败: {e}\n响应内容: {e.response.text}")
+            results = [r._replace(ok=False, failed_stage="secrets", error=str(e)) if r.ok else r for r in results]
+
+    print_report(results)
+    report_file = work / "batch_report.json"
+    report_file.write_text(
+        json.dumps([r._asdict() for r in results], ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"💾 报告: {report_file}（各目标日志: {work / 'logs'}）")
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        print(f"❌ {len(failed)}/{len(results)} 个目标失败")
+        return 1
+    print("🎉 全部完成！")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
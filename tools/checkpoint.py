@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+可恢复的建仓：阶段检查点 + 文件操作日志（journal）。
+
+状态目录（例如 repo_content.state/，不放在待推送的仓库里）：
+    checkpoint.json          已完成阶段 -> {key, outputs}；tree 为当前树每个文件的内容哈希
+    journal/<阶段>/          正在运行的阶段的操作日志与原内容备份
+
+- 每个阶段完成后写一次检查点（临时文件 + fsync + os.replace，断电也不会留下半个文件）。
+  key 由阶段名、工具代码、相关环境变量、来源树和前置阶段的 key 算出：
+  --resume 时 key 不变的已完成阶段直接跳过
+- 阶段运行期间，staging.write_text / move / remove_tree 先记日志（写之前备份原内容）再动手；
+  阶段失败或进程中途被杀时按日志逆序回滚，树回到上一个检查点的状态，再重跑这个阶段即可
+- 检查点里的 tree 与实际的树不一致（被手工改过、缓存不完整等）时不能原地恢复，
+  由调用方从新的上游副本重新开始
+
+工作流里的 shell 步骤通过命令行使用：
+    python3 tools/checkpoint.py done create --key "$NEW_REPO"      # 已完成则退出码为 0
+    python3 tools/checkpoint.py record push --tree repo_content
+状态目录由 --state 或环境变量 CLONEBOT_STATE 指定。
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import profiling
+
+STATE_ENV = "CLONEBOT_STATE"      # 状态目录
+JOURNAL_ENV = "CLONEBOT_JOURNAL"  # 当前阶段的日志目录；设置即启用
+
+TOOLS_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = TOOLS_DIR.parent / "templates"
+
+# 计算内容哈希时跳过的目录（与 pipeline 的快照一致）
+TREE_SKIP_DIRS = {".git", "target", "__pycache__"}
+
+
+class CheckpointMismatch(Exception):
+    """检查点与实际的树 / 输入不一致，不能原地恢复。"""
+
+
+# ---------- 哈希 ----------
+def file_digest(path: Path) -> str | None:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+def tree_manifest(root: Path, skip_dirs=TREE_SKIP_DIRS) -> dict[str, str]:
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in skip_dirs]
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            if os.path.islink(full):
+                continue
+            files[os.path.relpath(full, root).replace(os.sep, "/")] = file_digest(Path(full))
+    return files
+
+
+def digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def toolchain_digest() -> str:
+    """tools/ 与 templates/ 的内容：工具或模板改了，之前的检查点就不再适用。"""
+    files = [p for p in TOOLS_DIR.glob("*") if p.suffix in (".py", ".json")]
+    files += [p for p in TEMPLATES_DIR.rglob("*") if p.is_file()]
+    return digest(*sorted((str(p.relative_to(TOOLS_DIR.parent)), file_digest(p)) for p in files))
+
+
+def secret_key(token: str, *parts: str) -> str:
+    """secret 的检查点 key：用 token 做 HMAC，状态目录里不出现可离线猜测的明文哈希。"""
+    return hmac.new(token.encode(), "\0".join(parts).encode(), hashlib.sha256).hexdigest()
+
+
+def atomic_write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ---------- 检查点 ----------
+class Checkpoint:
+    def __init__(self, state: Path):
+        self.state = state
+        self.path = state / "checkpoint.json"
+        self.lock = threading.Lock()
+        self.data = self.load()
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"stages": {}, "source": None, "tree": None}
+
+    @property
+    def tree(self) -> dict[str, str] | None:
+        return self.data["tree"]
+
+    def done(self, name: str, key: str) -> bool:
+        rec = self.data["stages"].get(name)
+        return rec is not None and rec["key"] == key
+
+    def recorded(self, name: str) -> bool:
+        return name in self.data["stages"]
+
+    def record(self, name: str, key: str, outputs: dict[str, str | None] | None = None):
+        """记录阶段完成；outputs 为该阶段改动的文件（相对树根）及其新内容哈希，None 表示已删除。"""
+        with self.lock:
+            self.data = self.load()  # 其他进程（工作流步骤、copy_secrets）可能也写过
+            self.data["stages"][name] = {"key": key, "finished": time.time(), "outputs": outputs or {}}
+            if outputs and self.data["tree"] is not None:
+                for rel, sha in outputs.items():
+                    if sha is None:
+                        self.data["tree"].pop(rel, None)
+                    else:
+                        self.data["tree"][rel] = sha
+            self.save()
+
+    def start_tree(self, manifest: dict[str, str], names: list[str]):
+        """从一棵新的来源树开始：清掉 names 的记录，以当前内容为来源。"""
+        with self.lock:
+            self.data = self.load()
+            for name in names:
+                self.data["stages"].pop(name, None)
+            self.data["source"] = digest(manifest)
+            self.data["tree"] = manifest
+            self.save()
+
+    def reset(self):
+        with self.lock:
+            self.data = {"stages": {}, "source": None, "tree": None}
+            self.discard_journals()
+            self.save()
+
+    def save(self):
+        atomic_write_json(self.path, self.data)
+
+    def journal_dir(self, name: str) -> Path:
+        return self.state / "journal" / name
+
+    def discard_journals(self):
+        """树是新的（不是上次中断时的那棵）：旧日志不再适用，直接丢弃。"""
+        shutil.rmtree(self.state / "journal", ignore_errors=True)
+
+    def recover(self) -> dict[str, int]:
+        """处理上次中断留下的日志：已记录完成的阶段丢弃日志，其余回滚。返回 {阶段: 回滚的操作数}。"""
+        rolled = {}
+        root = self.state / "journal"
+        for d in sorted(root.iterdir()) if root.is_dir() else []:
+            if self.recorded(d.name):
+                shutil.rmtree(d)
+            else:
+                rolled[d.name] = rollback(d)
+        return rolled
+
+
+# ---------- 操作日志 ----------
+class Journal:
+    """一个阶段的 undo 日志：每条记录在对应的文件操作之前追加并 fsync。"""
+
+    def __init__(self, directory: Path):
+        self.dir = directory
+        self.backups = directory / "backup"
+        self.backups.mkdir(parents=True, exist_ok=True)
+        self.log = directory / "journal.jsonl"
+        self.lock = threading.Lock()
+        self.saved: set[str] = set()  # 本阶段已备份过的路径，只需保留第一次写之前的内容
+        self.seq = sum(1 for _ in open(self.log, encoding="utf-8")) if self.log.exists() else 0
+
+    def _append(self, entry: dict):
+        with open(self.log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.seq += 1
+
+    def before_write(self, path: Path):
+        path = os.path.abspath(path)
+        with self.lock:
+            if path in self.saved:
+                return
+            self.saved.add(path)
+            backup = None
+            if os.path.lexists(path):
+                backup = str(self.seq)
+                dst = self.backups / backup
+                # 仍与上游共享的硬链接文件会被 write_text 换成新 inode，链接一份就是完整备份
+                try:
+                    if os.stat(path).st_nlink <= 1:
+                        raise OSError
+                    os.link(path, dst)
+                except OSError:
+                    shutil.copy2(path, dst)
+            self._append({"op": "write", "path": path, "backup": backup})
+
+    def move(self, src: Path, dst: Path) -> str:
+        src, dst = os.path.abspath(src), os.path.abspath(dst)
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))  # 与 shutil.move 的语义一致
+        with self.lock:
+            # 移动之后这两处（含目录下的文件）再被写时，需要重新备份
+            self.saved = {p for p in self.saved
+                          if not any(p == x or p.startswith(x + os.sep) for x in (src, dst))}
+            self._append({"op": "move", "src": src, "dst": dst})
+        return shutil.move(src, dst)
+
+    def remove_tree(self, path: Path):
+        """删除目录：移进日志目录而不是真的删除，回滚时移回来。"""
+        trash = self.dir / "trash"
+        trash.mkdir(exist_ok=True)
+        self.move(path, trash / str(self.seq))
+
+
+def _prune_empty_parents(path: str):
+    parent = os.path.dirname(path)
+    while parent and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def rollback(directory: Path) -> int:
+    """按日志逆序撤销一个阶段的全部文件操作，然后删除日志。返回撤销的操作数。"""
+    log = directory / "journal.jsonl"
+    entries = []
+    if log.exists():
+        for line in log.read_text(encoding="utf-8").splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # 写了一半的最后一行：对应的操作还没开始
+
+    for entry in reversed(entries):
+        if entry["op"] == "write":
+            path = entry["path"]
+            if entry["backup"] is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(directory / "backup" / entry["backup"], path)
+            elif os.path.lexists(path):
+                os.unlink(path)
+                _prune_empty_parents(path)
+        elif entry["op"] == "move" and os.path.lexists(entry["dst"]):
+            os.makedirs(os.path.dirname(entry["src"]), exist_ok=True)
+            shutil.move(entry["dst"], entry["src"])
+            _prune_empty_parents(entry["dst"])
+
+    shutil.rmtree(directory)
+    return len(entries)
+
+
+def journal_paths(directory: Path) -> set[str]:
+    """日志里记录过的全部路径（写入的文件、移动的源与目标），绝对路径。"""
+    log = directory / "journal.jsonl"
+    paths = set()
+    if log.exists():
+        for line in log.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            paths.update(entry[k] for k in ("path", "src", "dst") if k in entry)
+    return paths
+
+
+_journals: dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+_local = threading.local()
+
+
+@contextmanager
+def journal_scope(directory: str | None):
+    """进程内运行的阶段（如 ci_template）没有自己的环境变量，按线程指定日志目录。"""
+    previous = getattr(_local, "journal", None)
+    _local.journal = directory
+    try:
+        yield
+    finally:
+        _local.journal = previous
+        with _journals_lock:
+            _journals.pop(directory, None)  # 日志目录用完即删，同名目录下次要重新建
+
+
+def current_journal() -> Journal | None:
+    """当前线程 journal_scope 指定的日志，否则为环境变量 CLONEBOT_JOURNAL（子工具进程里由 pipeline 设置）。"""
+    directory = getattr(_local, "journal", None) or os.environ.get(JOURNAL_ENV)
+    if not directory:
+        return None
+    with _journals_lock:
+        if directory not in _journals:
+            _journals[directory] = Journal(Path(directory))
+        return _journals[directory]
+
+
+# ---------- 命令行（供工作流的 shell 步骤使用） ----------
+def step_key(args) -> str:
+    parts = [args.name, args.key or ""]
+    if args.tree:
+        parts.append(digest(tree_manifest(args.tree)))
+    return digest(*parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="读写建仓检查点")
+    parser.add_argument("--state", type=Path, default=os.environ.get(STATE_ENV), help="状态目录（默认 $CLONEBOT_STATE）")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for action, help_text in (("done", "阶段已完成且输入未变时退出码为 0"), ("record", "记录阶段完成")):
+        p = sub.add_parser(action, help=help_text)
+        p.add_argument("name")
+        p.add_argument("--key", help="输入标识（例如仓库名）")
+        p.add_argument("--tree", type=Path, help="把该目录的内容哈希计入输入")
+    sub.add_parser("reset", help="清空检查点")
+    args = parser.parse_args()
+
+    if args.state is None:
+        print(f"❌ 需要 --state 或环境变量 {STATE_ENV}")
+        return 2
+    ckpt = Checkpoint(args.state)
+    if args.action == "reset":
+        ckpt.reset()
+        return 0
+    if args.action == "done":
+        done = ckpt.done(args.name, step_key(args))
+        if done:
+            print(f"⏭️  {args.name}: 已完成（检查点）")
+        return 0 if done else 1
+    ckpt.record(args.name, step_key(args))
+    print(f"💾 checkpoint: {args.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
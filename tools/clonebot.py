@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+统一入口：把 tools/ 下的各个工具作为子命令，按需导入。
+
+    python3 tools/clonebot.py --root repo_content pipeline --jobs 4
+    python3 tools/clonebot.py --root repo_content chain prune_modules,replace_all
+    python3 tools/clonebot.py copy-secrets
+
+- 子命令在被调用时才导入对应模块：转换类子命令不会加载 requests / nacl，
+  顶层与子命令的 --help 也不导入任何工具模块
+- --root 指定待处理的仓库根目录，不再需要先 cd（工具内部仍以当前目录为根，
+  这里在调用前后切换并恢复工作目录）
+- chain 在同一个进程里依次执行转换阶段，省去每个阶段的解释器启动与重复导入
+- 也可以作为库使用（同一时间只能有一个调用，工作目录是进程级状态）：
+
+    import clonebot
+    clonebot.run("validate", root="repo_content")
+    clonebot.chain("repo_content", ["split_api_biz", "validate_tree"])
+
+可以把本文件软链接到 PATH 中（例如 ~/.local/bin/clonebot），路径会解析回 tools/。
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+# 软链接调用时 sys.path[0] 是链接所在目录，需要指回 tools/
+TOOLS_DIR = Path(__file__).resolve().parent
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOLS_DIR))
+
+import profiling  # 以下两个模块只依赖标准库
+from tracing import span
+
+
+class Command(NamedTuple):
+    module: str
+    help: str
+    has_args: bool  # 模块自己解析参数；否则 --help 由这里回答，不导入模块
+
+
+COMMANDS = {
+    "fetch": Command("fetch_upstream", "blobless + sparse 获取上游代码", True),
+    "pipeline": Command("pipeline", "按读写声明并发执行全部转换阶段", True),
+    "chain": Command("pipeline", "在当前进程中依次执行转换阶段（逗号分隔，默认全部）", False),
+    "prune": Command("module_profile", "按 MODULE_PROFILE 裁剪模块", False),
+    "replace": Command("replace_all", "替换 yudao / ruoyi 文本与路径", False),
+    "uncomment": Command("uncomment_maven", "启用被注释的模块与依赖", False),
+    "restructure": Command("restructure_layout", "整理为 platform / apps / modules 布局", False),
+    "split": Command("split_api_biz", "拆分 -api / -biz 模块", False),
+    "maven-config": Command("maven_config", "写入 .mvn/ 构建缓存与并行度配置", False),
+    "patch": Command("patch_application_local", "按补丁规则修改 application-*.yaml", True),
+    "validate": Command("validate_tree", "检查转换结果的不变量", False),
+    "copy-secrets": Command("copy_secrets", "复制 secrets 到新仓库（读取环境变量）", False),
+    "batch": Command("batch_provision", "按 manifest 批量创建仓库", True),
+    "daemon": Command("provision_daemon", "常驻建仓服务", True),
+    "checkpoint": Command("checkpoint", "查询 / 记录建仓检查点（供工作流步骤使用）", True),
+}
+
+# 工作目录与 sys.argv 是进程级状态，库调用之间串行
+_call_lock = threading.RLock()
+
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run(command: str, argv: list[str] | tuple[str, ...] = (), root: str | Path | None = None) -> int:
+    """在 root 下执行一个子命令，返回退出码。"""
+    if command not in COMMANDS or command == "chain":
+        raise ValueError(f"未知子命令: {command}")
+    spec = COMMANDS[command]
+
+    with _call_lock:
+        module = importlib.import_module(spec.module)
+        old_argv, old_cwd = sys.argv, os.getcwd()
+        sys.argv = [f"clonebot {command}", *argv]
+        try:
+            if root is not None:
+                os.chdir(root)
+            return _exit_code(module.main())
+        except SystemExit as e:
+            return _exit_code(e.code)
+        finally:
+            sys.argv = old_argv
+            os.chdir(old_cwd)
+
+
+def chain(root: str | Path, stages: list[str] | None = None) -> bool:
+    """在当前进程中按声明顺序依次执行转换阶段，遇到失败即停止。"""
+    pipeline = importlib.import_module("pipeline")
+    selected = pipeline.select_stages(",".join(stages) if stages else None)
+    root = Path(root).resolve()
+
+    for stage in selected:
+        print(f"\n===== {stage.name} =====", flush=True)
+        with span(stage.name, cat="stage"):
+            script = getattr(stage.run, "script", None)
+            if script is None:
+                print(stage.run(root, dict(os.environ)).rstrip(), flush=True)
+                continue
+            command = next(name for name, c in COMMANDS.items() if c.module == Path(script).stem)
+            code = run(command, root=root)
+        if code != 0:
+            print(f"❌ {stage.name} 失败（退出码 {code}）")
+            return False
+    return True
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="clonebot",
+        description="Clone-Bot 工具集",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="子命令:\n" + "\n".join(f"  {name:<14} {c.help}" for name, c in COMMANDS.items()),
+    )
+    parser.add_argument("--root", type=Path, help="待处理的仓库根目录（默认当前目录）")
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="传给子命令的参数")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    spec = COMMANDS[args.command]
+
+    if not spec.has_args and {"-h", "--help"} & set(args.args):
+        print(f"usage: clonebot [--root DIR] {args.command}\n\n{spec.help}")
+        return 0
+
+    if args.command == "chain":
+        names = [n for a in args.args for n in a.split(",") if n]
+        try:
+            return 0 if chain(args.root or Path("."), names or None) else 1
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+
+    return run(args.command, args.args, args.root)
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
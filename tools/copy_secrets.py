@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""
+把 secrets 提供给新仓库（值来自同名环境变量）。
+
+SECRETS_SCOPE=repo（默认）：逐个加密写成仓库级 secret，每个仓库 M 次 PUT
+SECRETS_SCOPE=org：每个 secret 在组织级别只建一次（visibility=selected），
+    新仓库通过 selected-repositories 接口挂上去（单个仓库一次 PUT，不必先读列表），不必重新加密写值；
+    OWNER 是个人账号时自动回退为仓库级
+SECRETS_ROTATE=true（仅 org）：更新组织级 secret 的值（轮换密码），保留已挂载的仓库和原有 visibility；
+    org 模式下不设置 NEW_REPO 即只轮换、不挂载
+"""
+
 import os
 import sys
 import base64
 import requests
 from nacl import encoding, public
+from pathlib import Path
 from typing import NamedTuple
 
-REQUIRED_ENV_VARS = ("GH_PAT", "OWNER", "NEW_REPO")
+import profiling
+from checkpoint import STATE_ENV, Checkpoint, secret_key
+from tracing import span
+
+REQUIRED_ENV_VARS = ("GH_PAT", "OWNER")
+SECRETS_SCOPE_ENV = "SECRETS_SCOPE"    # repo / org
+SECRETS_ROTATE_ENV = "SECRETS_ROTATE"
 SECRETS_TO_COPY = [
     "DB_HOST", "DB_USERNAME", "DB_PASSWORD",
     "REDIS_HOST", "REDIS_PASSWORD",
@@ -54,37 +72,184 @@ def upsert_secret(cfg: RepoConfig, secret_name: str, encrypted_value: str, key_i
     print(f"✅ {action} secret: {secret_name}")
 
 
+def secret_values() -> tuple[dict[str, str], list[str]]:
+    """返回 ({secret 名: 值}, 环境变量为空而跳过的名称)。"""
+    values = {name: os.environ[name] for name in SECRETS_TO_COPY if os.environ.get(name)}
+    return values, [name for name in SECRETS_TO_COPY if name not in values]
+
+
+# ---------- 组织级 secrets ----------
+def owner_is_org(owner: str, token: str) -> bool:
+    resp = requests.get(f"{GITHUB_API}/users/{owner}", headers=make_headers(token), timeout=10)
+    resp.raise_for_status()
+    return resp.json().get("type") == "Organization"
+
+
+def get_repo_id(cfg: RepoConfig) -> int:
+    resp = requests.get(f"{GITHUB_API}/repos/{cfg.owner}/{cfg.repo}", headers=make_headers(cfg.token), timeout=10)
+    resp.raise_for_status()
+    return resp.json()["id"]
+
+
+def get_org_public_key(org: str, token: str) -> tuple[str, str]:
+    resp = requests.get(f"{GITHUB_API}/orgs/{org}/actions/secrets/public-key", headers=make_headers(token), timeout=10)
+    resp.raise_for_status()
+    data = resp.json()
+    return data["key_id"], data["key"]
+
+
+def list_org_secrets(org: str, token: str) -> dict[str, str]:
+    """组织级 secret 名 -> visibility（all / private / selected）。"""
+    secrets, page = {}, 1
+    while True:
+        resp = requests.get(f"{GITHUB_API}/orgs/{org}/actions/secrets", params={"per_page": 100, "page": page},
+                            headers=make_headers(token), timeout=10)
+        resp.raise_for_status()
+        batch = resp.json()["secrets"]
+        secrets.update((s["name"], s["visibility"]) for s in batch)
+        if len(batch) < 100:
+            return secrets
+        page += 1
+
+
+def selected_repo_ids(org: str, token: str, secret_name: str) -> set[int]:
+    url = f"{GITHUB_API}/orgs/{org}/actions/secrets/{secret_name}/repositories"
+    ids, page = set(), 1
+    while True:
+        resp = requests.get(url, params={"per_page": 100, "page": page}, headers=make_headers(token), timeout=10)
+        resp.raise_for_status()
+        batch = resp.json()["repositories"]
+        ids.update(r["id"] for r in batch)
+        if len(batch) < 100:
+            return ids
+        page += 1
+
+
+def upsert_org_secret(org: str, token: str, secret_name: str, encrypted_value: str, key_id: str,
+                      repo_ids: set[int], visibility: str = "selected"):
+    """visibility 为 all / private 时 repo_ids 不起作用（对组织内仓库都可见）。"""
+    url = f"{GITHUB_API}/orgs/{org}/actions/secrets/{secret_name}"
+    payload = {"encrypted_value": encrypted_value, "key_id": key_id, "visibility": visibility}
+    if visibility == "selected":
+        payload["selected_repository_ids"] = sorted(repo_ids)
+    resp = requests.put(url, json=payload, headers=make_headers(token), timeout=10)
+    resp.raise_for_status()
+    action = "创建" if resp.status_code == 201 else "更新"
+    scope = f"{len(repo_ids)} 个仓库" if visibility == "selected" else f"visibility={visibility}"
+    print(f"✅ {action} 组织级 secret: {secret_name}（{scope}）")
+
+
+def add_selected_repo(org: str, token: str, secret_name: str, repo_id: int):
+    """把单个仓库挂到 selected secret 上：幂等，不用先读已挂载列表，并发运行也不会互相覆盖。"""
+    url = f"{GITHUB_API}/orgs/{org}/actions/secrets/{secret_name}/repositories/{repo_id}"
+    resp = requests.put(url, headers=make_headers(token), timeout=10)
+    resp.raise_for_status()
+
+
+def set_selected_repos(org: str, token: str, secret_name: str, repo_ids: set[int]):
+    """整体替换挂载列表，只用于批量挂载（调用方先读出已挂载的仓库再合并）。"""
+    url = f"{GITHUB_API}/orgs/{org}/actions/secrets/{secret_name}/repositories"
+    resp = requests.put(url, json={"selected_repository_ids": sorted(repo_ids)}, headers=make_headers(token), timeout=10)
+    resp.raise_for_status()
+
+
+def provision_org_secrets(org: str, token: str, values: dict[str, str], repo_ids: set[int], rotate: bool = False):
+    """
+    组织级 secret：不存在（或 rotate）时加密写值一次，否则只把 repo_ids 挂上去。
+    挂单个仓库只需一次 PUT；批量挂载每个 secret 一次 GET（已挂载的仓库）+ 至多一次 PUT，与仓库数量无关。
+    visibility 为 all / private 的 secret 已对仓库可见，只在 rotate 时按原 visibility 重写值。
+    """
+    existing = list_org_secrets(org, token)
+    key = None
+    for name, value in values.items():
+        visibility = existing.get(name)
+        if visibility not in (None, "selected") and not rotate:
+            print(f"ℹ️  {name}: 组织级 visibility={visibility}，已对仓库可见，不修改")
+            continue
+        with span("org secret", cat="github", secret=name):
+            if visibility is None or rotate:
+                if key is None:
+                    key = get_org_public_key(org, token)
+                current = selected_repo_ids(org, token, name) if visibility == "selected" else set()
+                upsert_org_secret(org, token, name, encrypt_secret(key[1], value), key[0], current | repo_ids,
+                                  visibility=visibility or "selected")
+            elif len(repo_ids) == 1:
+                add_selected_repo(org, token, name, next(iter(repo_ids)))
+                print(f"✅ 挂载 {name}")
+            elif repo_ids:
+                current = selected_repo_ids(org, token, name)
+                if repo_ids - current:
+                    set_selected_repos(org, token, name, current | repo_ids)
+                    print(f"✅ 挂载 {name} -> {len(repo_ids - current)} 个仓库")
+                else:
+                    print(f"⏭️  {name}: 仓库已挂载")
+
+
+# ---------- 仓库级 secrets ----------
+def copy_repo_secrets(cfg: RepoConfig, values: dict[str, str]) -> int:
+    print(f"📥 获取 {cfg.repo} 的公钥...")
+    with span("get public key", cat="github", repo=cfg.repo):
+        key_id, pub_key = get_public_key(cfg)
+    print(f"✅ 获取公钥成功 (key_id: {key_id})")
+
+    # 设置了 CLONEBOT_STATE 时每个 secret 写入后记检查点，重跑时跳过值没变的
+    ckpt = Checkpoint(Path(os.environ[STATE_ENV])) if os.environ.get(STATE_ENV) else None
+
+    copied = 0
+    for secret_name, value in values.items():
+        step, key = f"secret:{secret_name}", secret_key(cfg.token, cfg.owner, cfg.repo, key_id, value)
+        if ckpt is not None and ckpt.done(step, key):
+            print(f"⏭️  {secret_name}: 已复制（检查点）")
+            continue
+        with span("encrypt secret", cat="crypto", secret=secret_name):
+            encrypted = encrypt_secret(pub_key, value)
+        with span("put secret", cat="github", secret=secret_name):
+            upsert_secret(cfg, secret_name, encrypted, key_id)
+        if ckpt is not None:
+            ckpt.record(step, key)
+        copied += 1
+    return copied
+
+
 def main():
-    missing = [v for v in REQUIRED_ENV_VARS if not os.environ.get(v)]
+    scope = os.environ.get(SECRETS_SCOPE_ENV) or "repo"
+    if scope not in ("repo", "org"):
+        print(f"❌ {SECRETS_SCOPE_ENV} 只能是 repo 或 org: {scope}")
+        sys.exit(1)
+    required = REQUIRED_ENV_VARS + (("NEW_REPO",) if scope == "repo" else ())
+    missing = [v for v in required if not os.environ.get(v)]
     if missing:
         print(f"❌ 缺少必需的环境变量: {', '.join(missing)}")
         sys.exit(1)
 
     cfg = RepoConfig(
         owner=os.environ["OWNER"],
-        repo=os.environ["NEW_REPO"],
+        repo=os.environ.get("NEW_REPO", ""),
         token=os.environ["GH_PAT"],
     )
-
-    print(f"🔐 开始复制 secrets 到 {cfg.owner}/{cfg.repo}...")
+    values, empty = secret_values()
+    for name in empty:
+        print(f"⚠️  跳过 {name}: 环境变量不存在或为空")
 
     try:
-        print(f"📥 获取 {cfg.repo} 的公钥...")
-        key_id, pub_key = get_public_key(cfg)
-        print(f"✅ 获取公钥成功 (key_id: {key_id})")
-
-        copied, skipped = 0, 0
-        for secret_name in SECRETS_TO_COPY:
-            value = os.environ.get(secret_name)
-            if not value:
-                print(f"⚠️  跳过 {secret_name}: 环境变量不存在或为空")
-                skipped += 1
-                continue
-            encrypted = encrypt_secret(pub_key, value)
-            upsert_secret(cfg, secret_name, encrypted, key_id)
-            copied += 1
+        if scope == "org" and not owner_is_org(cfg.owner, cfg.token):
+            print(f"ℹ️  {cfg.owner} 是个人账号，没有组织级 secrets，回退为仓库级")
+            scope = "repo"
+            if not cfg.repo:
+                print("❌ 缺少必需的环境变量: NEW_REPO")
+                sys.exit(1)
 
-        print(f"\n🎉 完成！已复制 {copied} 个 secrets，跳过 {skipped} 个")
+        if scope == "org":
+            rotate = os.environ.get(SECRETS_ROTATE_ENV, "").lower() == "true" or not cfg.repo
+            target = f"{cfg.owner}/{cfg.repo}" if cfg.repo else f"组织 {cfg.owner}（仅轮换）"
+            print(f"🔐 组织级 secrets -> {target}...")
+            repo_ids = {get_repo_id(cfg)} if cfg.repo else set()
+            provision_org_secrets(cfg.owner, cfg.token, values, repo_ids, rotate=rotate)
+            print(f"\n🎉 完成！{len(values)} 个组织级 secrets，跳过 {len(empty)} 个")
+        else:
+            print(f"🔐 开始复制 secrets 到 {cfg.owner}/{cfg.repo}...")
+            copied = copy_repo_secrets(cfg, values)
+            print(f"\n🎉 完成！已复制 {copied} 个 secrets，跳过 {len(empty)} 个")
 
     except requests.HTTPError as e:
         print(f"❌ HTTP 错误: {e}\n响应内容: {e.response.text}")
@@ -95,4 +260,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
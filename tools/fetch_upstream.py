@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+获取上游代码：blobless 部分克隆 + sparse-checkout，被排除的路径的文件内容从不下载、从不落盘。
+
+1. git clone --filter=blob:none --no-checkout --depth=1：只下载 commit 与目录树
+2. 按排除列表（UPSTREAM_EXCLUDES）与模块配置排除的 *-module-xxx 生成 sparse-checkout 规则；
+   被排除的模块只检出 pom.xml 骨架，module_profile 裁剪时仍能据此清理其他 pom 对它们的引用
+3. git checkout：只为保留的路径按需拉取文件内容
+4. 删除 .git，得到与原来“clone 再 rm -rf”相同的目录（外加被排除模块的 pom 骨架）
+
+服务端不支持过滤（如未开启 uploadpack.allowFilter）时 git 会退化为完整克隆，sparse-checkout 仍然生效；
+部分克隆 / sparse-checkout 本身失败时回退到原来的完整克隆 + 删除（模块留给 module_profile 裁剪）。
+
+用法（在 Clone-Bot 仓库根目录）：
+    python3 tools/fetch_upstream.py repo_content
+    python3 tools/fetch_upstream.py repo_content --upstream file:///tmp/upstream.git --module-profile basic
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import profiling
+from module_profile import ModuleProfile, load_profile, module_name
+from tracing import span
+
+UPSTREAM_URL = "https://github.com/YunaiV/ruoyi-vue-pro.git"
+UPSTREAM_BRANCH = "master-jdk17"
+
+# clone 之后不需要的上游路径
+UPSTREAM_EXCLUDES = [".git", ".gitee", ".github", ".image", "Readme.md", "yudao-ui", "sql"]
+
+# 服务端 / 本地路径克隆忽略 --filter 时 git 给出的提示
+FILTER_IGNORED = ("filtering not recognized by server", "--filter is ignored")
+
+
+def git(args: list[str], cwd: Path | None = None, stdin: str | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, input=stdin, capture_output=True, text=True, check=True)
+
+
+def excluded_module_dirs(names: list[str], profile: ModuleProfile | None) -> list[str]:
+    if profile is None:
+        return []
+    return [n for n in names if (m := module_name(n)) is not None and not profile.enabled(m)]
+
+
+def sparse_patterns(excludes: list[str], skeletons: list[str]) -> list[str]:
+    """非 cone 模式的规则：先包含全部，再排除顶层路径；skeletons 中的目录只保留各级 pom.xml。"""
+    patterns = ["/*", *(f"!/{rel}" for rel in excludes if rel != ".git")]
+    for d in skeletons:
+        patterns += [f"!/{d}/**", f"/{d}/**/pom.xml"]
+    return patterns
+
+
+def drop_paths(root: Path, rels: list[str]):
+    for rel in rels:
+        p = root / rel
+        if p.is_dir():
+            shutil.rmtree(p)
+        elif p.exists():
+            p.unlink()
+
+
+def git_size(dest: Path) -> int:
+    return sum(f.stat().st_size for f in (dest / ".git" / "objects").rglob("*") if f.is_file())
+
+
+def partial_clone(url: str, branch: str, dest: Path, profile: ModuleProfile | None) -> str:
+    """blobless + sparse；返回模式说明。"""
+    with span("clone --filter=blob:none", cat="git", url=url):
+        proc = git(["clone", "-q", "--filter=blob:none", "--no-checkout", "--depth=1", "--single-branch",
+                    "-b", branch, url, str(dest)])
+    filtered = not any(msg in proc.stderr for msg in FILTER_IGNORED)
+
+    # 目录树已经在本地，可以在 checkout 之前确定要排除的模块目录
+    top_level = git(["ls-tree", "--name-only", "HEAD"], cwd=dest).stdout.split()
+    skeletons = excluded_module_dirs(top_level, profile)
+
+    with span("sparse checkout", cat="git", excludes=len(UPSTREAM_EXCLUDES) + len(skeletons)):
+        git(["sparse-checkout", "set", "--no-cone", "--stdin"], cwd=dest,
+            stdin="\n".join(sparse_patterns(UPSTREAM_EXCLUDES, skeletons)) + "\n")
+        git(["checkout", "-q", branch], cwd=dest)
+
+    size = git_size(dest)
+    drop_paths(dest, UPSTREAM_EXCLUDES)  # 删除 .git；sparse 生效时其余路径本来就不存在
+    mode = "blobless sparse" if filtered else "full clone (server ignored filter) + sparse"
+    return f"{mode}, {size / 1024 / 1024:.1f} MB objects, {len(skeletons)} module skeletons"
+
+
+def full_clone(url: str, branch: str, dest: Path) -> str:
+    with span("clone", cat="git", url=url):
+        git(["clone", "-q", "--depth=1", "--single-branch", "-b", branch, url, str(dest)])
+    size = git_size(dest)
+    drop_paths(dest, UPSTREAM_EXCLUDES)
+    return f"full clone, {size / 1024 / 1024:.1f} MB objects"
+
+
+def fetch(url: str, branch: str, dest: Path, profile: ModuleProfile | None = None) -> str:
+    """获取上游到 dest（不含 .git）；profile 为 None 时不按模块排除。"""
+    if dest.exists():
+        shutil.rmtree(dest)
+    try:
+        return partial_clone(url, branch, dest, profile)
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️  部分克隆失败，回退到完整克隆: {e.stderr.strip() or e}", flush=True)
+        shutil.rmtree(dest, ignore_errors=True)
+        return full_clone(url, branch, dest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="blobless + sparse 获取上游代码")
+    parser.add_argument("dest", type=Path)
+    parser.add_argument("--upstream", default=UPSTREAM_URL, help="上游仓库 URL（可用 file:// 本地仓库）")
+    parser.add_argument("--branch", default=UPSTREAM_BRANCH)
+    parser.add_argument("--module-profile", help="按模块配置排除模块（默认读取 MODULE_PROFILE）")
+    parser.add_argument("--all-modules", action="store_true", help="不按模块配置排除（共享的上游副本）")
+    args = parser.parse_args()
+
+    profile = None
+    if not args.all_modules:
+        try:
+            profile = load_profile(args.module_profile)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+
+    print(f"📥 fetching {args.upstream} ({args.branch}) -> {args.dest}")
+    try:
+        summary = fetch(args.upstream, args.branch, args.dest, profile)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ clone 失败: {e.stderr.strip() or e}")
+        return 1
+    print(f"✅ {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Java 源码的包 / 类型 / import 索引（多进程扫描），供 split_api_biz 在写任何文件之前
+算出 -api 源码真正需要哪些类型。
+
+每个文件只记录：所在包、声明的类型、import、正文里出现的大写开头标识符
+（同包类型不需要 import，只能靠标识符匹配）。不做完整的 Java 解析：
+注释与字符串字面量先被剥掉，其余用正则近似，宁可多算依赖也不漏。
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from tracing import span
+
+INDEX_CHUNK = 256
+
+RE_COMMENT_OR_STRING = re.compile(
+    r'/\*.*?\*/|//[^\n]*|"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL,
+)
+RE_PACKAGE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+RE_IMPORT = re.compile(r"^\s*import\s+(static\s+)?([\w.]+(?:\.\*)?)\s*;", re.MULTILINE)
+RE_TYPE_DECL = re.compile(r"\b(?:class|interface|enum|record|@interface)\s+([A-Z]\w*)")
+RE_TYPE_REF = re.compile(r"\b[A-Z]\w*\b")
+
+
+class JavaFile(NamedTuple):
+    rel: str                       # 相对扫描根目录
+    package: str
+    types: tuple[str, ...]         # 声明的类型（含嵌套类型的简单名）
+    imports: tuple[str, ...]       # 全限定名；static import 去掉成员名；通配符保留 .*
+    refs: frozenset[str]           # 正文中出现的大写开头标识符
+
+
+def parse_java(rel: str, text: str) -> JavaFile:
+    code = RE_COMMENT_OR_STRING.sub(lambda m: "" if m.group(0).startswith("/") else '""', text)
+    pm = RE_PACKAGE.search(code)
+    imports = []
+    for m in RE_IMPORT.finditer(code):
+        name = m.group(2)
+        if m.group(1) and not name.endswith(".*"):
+            name = name.rpartition(".")[0]  # import static a.b.Type.MEMBER -> a.b.Type
+        imports.append(name)
+    body = RE_IMPORT.sub("", RE_PACKAGE.sub("", code, count=1))
+    return JavaFile(
+        rel=rel,
+        package=pm.group(1) if pm else "",
+        types=tuple(dict.fromkeys(RE_TYPE_DECL.findall(body))),
+        imports=tuple(imports),
+        refs=frozenset(RE_TYPE_REF.findall(body)),
+    )
+
+
+def _index_chunk(root: str, rels: list[str]) -> list[JavaFile]:
+    with span("index batch", cat="java", files=len(rels)):
+        out = []
+        for rel in rels:
+            with open(os.path.join(root, rel), encoding="utf-8", errors="replace") as f:
+                out.append(parse_java(rel, f.read()))
+        return out
+
+
+def list_java(root: Path, source_roots: list[Path]) -> list[str]:
+    rels = []
+    for src in source_roots:
+        for dirpath, _, filenames in os.walk(src):
+            rels += [os.path.relpath(os.path.join(dirpath, n), root).replace(os.sep, "/")
+                     for n in filenames if n.endswith(".java")]
+    return sorted(rels)
+
+
+def build_index(root: Path, source_roots: list[Path]) -> dict[str, JavaFile]:
+    """扫描 source_roots 下全部 .java，返回 {相对 root 的路径: JavaFile}。"""
+    rels = list_java(root, source_roots)
+    chunks = [rels[i:i + INDEX_CHUNK] for i in range(0, len(rels), INDEX_CHUNK)]
+    if len(chunks) <= 1:
+        results = [_index_chunk(str(root), rels)]
+    else:
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(_index_chunk, [str(root)] * len(chunks), chunks))
+    return {jf.rel: jf for chunk in results for jf in chunk}
+
+
+class TypeIndex:
+    """一组源码（通常是一个模块）内的类型查找与依赖闭包。"""
+
+    def __init__(self, files: list[JavaFile]):
+        self.files = {jf.rel: jf for jf in files}
+        self.by_fqn: dict[str, str] = {}
+        self.by_package: dict[str, dict[str, str]] = {}
+        for jf in files:
+            for t in jf.types:
+                self.by_fqn.setdefault(f"{jf.package}.{t}", jf.rel)
+                self.by_package.setdefault(jf.package, {}).setdefault(t, jf.rel)
+
+    def resolve_import(self, name: str) -> set[str]:
+        if name.endswith(".*"):
+            prefix = name[:-2]
+            # import a.b.* 导入包；import a.b.Outer.* 导入嵌套类型（都在 Outer 所在文件）
+            return set(self.by_package.get(prefix, {}).values()) or self.resolve_import(prefix)
+        while "." in name:  # a.b.Outer.Inner -> a.b.Outer
+            if name in self.by_fqn:
+                return {self.by_fqn[name]}
+            name = name.rpartition(".")[0]
+        return set()
+
+    def dependencies(self, rel: str) -> set[str]:
+        """rel 直接依赖的、本索引内的其他文件。"""
+        jf = self.files[rel]
+        deps = set()
+        for name in jf.imports:
+            deps |= self.resolve_import(name)
+        same_package = self.by_package.get(jf.package, {})
+        deps |= {same_package[r] for r in jf.refs if r in same_package}
+        deps.discard(rel)
+        return deps
+
+    def closure(self, seeds: set[str]) -> dict[str, str]:
+        """seeds 的传递依赖（不含 seeds 本身），返回 {依赖文件: 最先引入它的文件}。"""
+        needed: dict[str, str] = {}
+        stack = sorted(seeds)
+        while stack:
+            rel = stack.pop()
+            for dep in sorted(self.dependencies(rel)):
+                if dep not in seeds and dep not in needed:
+                    needed[dep] = rel
+                    stack.append(dep)
+        return needed
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+为生成的仓库写入 .mvn/ 配置：构建缓存扩展 + 按 reactor 形状选择的并行度。
+
+1. .mvn/extensions.xml：启用 maven-build-cache-extension（需要 Maven 3.9+）
+2. .mvn/maven-build-cache-config.xml：本地缓存（~/.m2/build-cache，由 maven.yml 在两次运行之间持久化）；
+   远程缓存默认关闭，可用 -Dmaven.build.cache.remote.enabled=true
+   -Dmaven.build.cache.remote.url=file:///共享目录 接到共享目录 / HTTP 存储上
+3. .mvn/maven.config：-T 线程数。按模块依赖图分层（同一层的模块互不依赖，可以同时构建），
+   最宽一层的模块数即可用的并行度，不超过 runner 的核数（超过时用 1C，按核数）
+
+必须在 split_api_biz 之后运行：拆分后的 reactor 才是最终要构建的模块集合。
+已有的 .mvn/ 文件会合并：maven.config 只替换线程参数，extensions.xml 已声明扩展时不重复添加。
+
+用法（在待处理的仓库根目录）：
+    python3 ../tools/maven_config.py
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import profiling
+from module_profile import project_artifact_id
+from restructure_layout import XML_COMMENT, reactor_poms
+from split_api_biz import RE_DEP_A, RE_DEP_BLOCK, RE_PARENT_BLOCK
+from staging import write_text
+from tracing import span
+
+MVN_DIR = Path(".mvn")
+
+BUILD_CACHE_GROUP = "org.apache.maven.extensions"
+BUILD_CACHE_ARTIFACT = "maven-build-cache-extension"
+BUILD_CACHE_VERSION = "1.2.0"
+
+# GitHub ubuntu-latest runner 的核数
+RUNNER_CORES = 4
+
+# 本地缓存保留的构建数（每个模块）
+MAX_BUILDS_CACHED = 3
+
+# 参与输入哈希的文件（其余如 README 改动不会让模块缓存失效）
+CACHE_INPUT_GLOB = "{*.java,*.xml,*.properties,*.yaml,*.yml,*.sql,*.ftl,*.vm,*.json}"
+
+RE_THREADS_ARG = re.compile(r"^(?:-T|--threads)(?:[ =]?\S+)?$")
+
+EXTENSION_XML = f"""    <extension>
+        <groupId>{BUILD_CACHE_GROUP}</groupId>
+        <artifactId>{BUILD_CACHE_ARTIFACT}</artifactId>
+        <version>{BUILD_CACHE_VERSION}</version>
+    </extension>
+"""
+
+EXTENSIONS_XML = f"""<?xml version="1.0" encoding="UTF-8"?>
+<!-- 由 Clone-Bot 生成：Maven 构建缓存，未改动的模块直接复用上次的产物 -->
+<extensions>
+{EXTENSION_XML}</extensions>
+"""
+
+BUILD_CACHE_CONFIG_XML = f"""<?xml version="1.0" encoding="UTF-8"?>
+<!--
+  由 Clone-Bot 生成。本地缓存位于 ~/.m2/build-cache（CI 中由 actions/cache 持久化）。
+  远程（共享目录 / HTTP）缓存默认关闭：
+    mvn ... -Dmaven.build.cache.remote.enabled=true -Dmaven.build.cache.remote.url=file:///path/to/cache
+  只读使用远程缓存时加 -Dmaven.build.cache.remote.save.enabled=false
+-->
+<cache xmlns="http://maven.apache.org/BUILD-CACHE-CONFIG/1.0.0"
+       xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+       xsi:schemaLocation="http://maven.apache.org/BUILD-CACHE-CONFIG/1.0.0 https://maven.apache.org/xsd/build-cache-config-1.0.0.xsd">
+    <configuration>
+        <enabled>true</enabled>
+        <hashAlgorithm>XX</hashAlgorithm>
+        <validateXml>true</validateXml>
+        <remote enabled="false" saveToRemote="true" id="clonebot-build-cache"/>
+        <local>
+            <maxBuildsCached>{MAX_BUILDS_CACHED}</maxBuildsCached>
+        </local>
+        <projectVersioning adjustMetaInf="true"/>
+    </configuration>
+    <input>
+        <global>
+            <glob>{CACHE_INPUT_GLOB}</glob>
+            <includes>
+                <include>src/</include>
+            </includes>
+        </global>
+    </input>
+</cache>
+"""
+
+
+# ---------- reactor ----------
+def reactor_graph(root: Path) -> dict[str, set[str]]:
+    """reactor 内模块 artifactId -> 它依赖的 reactor 内模块（<dependency> 与 <parent>）。"""
+    xml_of = {}
+    for pom in reactor_poms(root / "pom.xml")[0]:
+        xml = XML_COMMENT.sub("", pom.read_text(encoding="utf-8"))
+        aid = project_artifact_id(xml)
+        if aid:
+            xml_of[aid] = xml
+
+    graph = {}
+    for aid, xml in xml_of.items():
+        deps = {a.group(1) for d in RE_DEP_BLOCK.findall(xml) if (a := RE_DEP_A.search(d))}
+        parent = RE_PARENT_BLOCK.search(xml)
+        if parent and (pa := RE_DEP_A.search(parent.group(1))):
+            deps.add(pa.group(1))
+        graph[aid] = {d for d in deps if d in xml_of and d != aid}
+    return graph
+
+
+def reactor_levels(graph: dict[str, set[str]]) -> list[set[str]]:
+    """按最长依赖链分层：第 n 层的模块只依赖前 n-1 层，同层模块可以并行构建。"""
+    depth: dict[str, int] = {}
+
+    def visit(aid: str, path: set[str]) -> int:
+        if aid not in depth:
+            path.add(aid)  # 依赖环（本应由 Maven 报错）按断开处理
+            depth[aid] = 1 + max((visit(d, path) for d in graph[aid] if d not in path), default=-1)
+            path.discard(aid)
+        return depth[aid]
+
+    for aid in sorted(graph):
+        visit(aid, set())
+    levels: list[set[str]] = [set() for _ in range(max(depth.values(), default=-1) + 1)]
+    for aid, n in depth.items():
+        levels[n].add(aid)
+    return levels
+
+
+def thread_count(width: int) -> str:
+    if width >= RUNNER_CORES:
+        return "1C"
+    return str(max(1, width))
+
+
+# ---------- .mvn/ ----------
+def merge_maven_config(existing: str, threads: str) -> str:
+    """maven.config 每行一个参数（Maven 3.9+）；去掉旧的线程参数后追加新的。"""
+    lines = [ln.strip() for ln in existing.splitlines() if ln.strip()]
+    kept, skip_value = [], False
+    for ln in lines:
+        if skip_value:
+            skip_value = False
+            continue
+        if ln in ("-T", "--threads"):
+            skip_value = True
+            continue
+        if not RE_THREADS_ARG.match(ln):
+            kept.append(ln)
+    return "\n".join([*kept, "-T", threads]) + "\n"
+
+
+def merge_extensions(existing: str | None) -> str:
+    if existing is None:
+        return EXTENSIONS_XML
+    if f"<artifactId>{BUILD_CACHE_ARTIFACT}</artifactId>" in existing:
+        return existing
+    return existing.replace("</extensions>", EXTENSION_XML + "</extensions>", 1)
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    write_text(path, text)
+    return True
+
+
+def main():
+    root = Path(".")
+    if not (root / "pom.xml").exists():
+        print("❌ Run this script at repo root (pom.xml not found).")
+        return 1
+
+    with span("reactor levels", cat="maven"):
+        levels = reactor_levels(reactor_graph(root))
+    width = max((len(level) for level in levels), default=0)
+    threads = thread_count(width)
+    print(f"📊 reactor: {sum(map(len, levels))} 个模块，{len(levels)} 层，最宽一层 {width} 个 -> -T {threads}")
+
+    mvn = root / MVN_DIR
+    mvn.mkdir(exist_ok=True)
+    config = mvn / "maven.config"
+    extensions = mvn / "extensions.xml"
+    files = {
+        config: merge_maven_config(config.read_text(encoding="utf-8") if config.exists() else "", threads),
+        extensions: merge_extensions(extensions.read_text(encoding="utf-8") if extensions.exists() else None),
+        mvn / "maven-build-cache-config.xml": BUILD_CACHE_CONFIG_XML,
+    }
+    for path, text in files.items():
+        if write_if_changed(path, text):
+            print(f"✅ 写入 {path.as_posix()}")
+        else:
+            print(f"⏭️  {path.as_posix()} 无变化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模块选择配置（module profile）。
+
+clone 之后立刻运行本脚本，把配置中排除的 *-module-xxx 目录整体删掉，
+后续 replace_all / uncomment_maven / restructure_layout 就不会再处理这些模块。
+restructure_layout 也读取同一份配置来生成 root modules 与聚合 pom。
+
+配置通过环境变量 MODULE_PROFILE 选择：
+- 不设置：full（不裁剪）
+- 配置名：从 module_profiles.json 中查找
+- 以 .json 结尾的路径：直接读取该文件（内容为单个配置）
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import profiling
+from staging import remove_tree, write_text
+
+PROFILES_FILE = Path(__file__).with_name("module_profiles.json")
+DEFAULT_PROFILE = "full"
+
+# future-server 直接依赖这些模块，任何配置都不能排除
+REQUIRED_MODULES = {"system", "infra"}
+
+# 查找 pom.xml 时不进入的目录（pom 不会出现在源码 / 构建产物目录里）
+POM_SKIP_DIRS = {"src", "target", ".git", ".idea", "node_modules"}
+
+RE_MODULE_DIR = re.compile(r"^(?:yudao|future)-module-([A-Za-z0-9]+)$")
+RE_ARTIFACT = re.compile(r"<artifactId>\s*([^<]+?)\s*</artifactId>")
+RE_PARENT_BLOCK = re.compile(r"<parent>\s*.*?</parent>", re.DOTALL)
+RE_DEP_BLOCK = re.compile(r"[ \t]*<dependency>\s*.*?</dependency>[ \t]*\n?", re.DOTALL)
+RE_MODULE_ENTRY = re.compile(r"^[ \t]*(?:<!--\s*)?<module>\s*([^<]+?)\s*</module>(?:\s*-->)?[ \t]*\n?", re.MULTILINE)
+
+
+class ModuleProfile(NamedTuple):
+    name: str
+    include: frozenset[str]  # 为空表示全部包含
+    exclude: frozenset[str]
+
+    def enabled(self, module: str) -> bool:
+        if module in self.exclude:
+            return False
+        return not self.include or module in self.include
+
+
+def parse_profile(name: str, data: dict) -> ModuleProfile:
+    profile = ModuleProfile(
+        name=name,
+        include=frozenset(data.get("include", [])),
+        exclude=frozenset(data.get("exclude", [])),
+    )
+    dropped = [m for m in sorted(REQUIRED_MODULES) if not profile.enabled(m)]
+    if dropped:
+        raise ValueError(f"模块配置 {name} 排除了必需模块: {', '.join(dropped)}")
+    return profile
+
+
+def load_profile(spec: str | None = None) -> ModuleProfile:
+    """按名称或 .json 路径加载配置；spec 为空时读取环境变量 MODULE_PROFILE。"""
+    spec = spec or os.environ.get("MODULE_PROFILE") or DEFAULT_PROFILE
+    if spec.endswith(".json"):
+        path = Path(spec)
+        return parse_profile(path.stem, json.loads(path.read_text(encoding="utf-8")))
+
+    profiles = json.loads(PROFILES_FILE.read_text(encoding="utf-8"))
+    if spec not in profiles:
+        raise ValueError(f"未知的模块配置: {spec}（可选: {', '.join(profiles)}）")
+    return parse_profile(spec, profiles[spec])
+
+
+def module_name(dir_name: str) -> str | None:
+    """yudao-module-iot / future-module-iot -> iot；其他目录返回 None。"""
+    m = RE_MODULE_DIR.match(dir_name)
+    return m.group(1) if m else None
+
+
+def iter_poms(root: Path):
+    """只在模块目录层级里找 pom.xml，不下钻 src/ 等目录。"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in POM_SKIP_DIRS]
+        if "pom.xml" in filenames:
+            yield Path(dirpath) / "pom.xml"
+
+
+def project_artifact_id(pom_xml: str) -> str | None:
+    parent_m = RE_PARENT_BLOCK.search(pom_xml)
+    for m in RE_ARTIFACT.finditer(pom_xml):
+        if parent_m and parent_m.start() <= m.start() <= parent_m.end():
+            continue
+        return m.group(1)
+    return None
+
+
+def drop_module_refs(pom_xml: str, module_dirs: set[str], artifacts: set[str]) -> str:
+    """删除指向已裁剪模块的 <module> 行（含注释掉的）与 <dependency> 块。"""
+
+    def drop_module(m):
+        return "" if m.group(1).split("/")[-1] in module_dirs else m.group(0)
+
+    def drop_dep(m):
+        am = RE_ARTIFACT.search(m.group(0))
+        return "" if am and am.group(1) in artifacts else m.group(0)
+
+    pom_xml = RE_MODULE_ENTRY.sub(drop_module, pom_xml)
+    return RE_DEP_BLOCK.sub(drop_dep, pom_xml)
+
+
+def prune_modules(root: Path, profile: ModuleProfile) -> list[str]:
+    """删除被排除的模块目录，并清理其余 pom 对它们的引用。返回被删除的目录名。"""
+    pruned_dirs: set[str] = set()
+    pruned_artifacts: set[str] = set()
+
+    for d in sorted(root.iterdir()):
+        name = module_name(d.name)
+        if not d.is_dir() or name is None or profile.enabled(name):
+            continue
+        for pom in iter_poms(d):
+            aid = project_artifact_id(pom.read_text(encoding="utf-8"))
+            if aid:
+                pruned_artifacts.add(aid)
+        remove_tree(d)
+        pruned_dirs.add(d.name)
+        print(f"✂️  pruned: {d.name}")
+
+    if pruned_dirs:
+        for pom in iter_poms(root):
+            xml = pom.read_text(encoding="utf-8")
+            new_xml = drop_module_refs(xml, pruned_dirs, pruned_artifacts)
+            if new_xml != xml:
+                write_text(pom, new_xml)
+                print(f"✅ dropped pruned module refs: {pom}")
+
+    return sorted(pruned_dirs)
+
+
+def main():
+    try:
+        profile = load_profile()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🚀 按模块配置裁剪: {profile.name}")
+    if profile.include:
+        print(f"   include: {', '.join(sorted(profile.include))}")
+    if profile.exclude:
+        print(f"   exclude: {', '.join(sorted(profile.exclude))}")
+
+    pruned = prune_modules(Path("."), profile)
+    print(f"🎉 done. pruned module count = {len(pruned)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
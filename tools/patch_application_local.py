@@ -1,116 +1,340 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple
+
+import profiling
+from staging import write_text
+from tracing import span
+
+# 补丁规则文件：每条规则 = 名称 + 目标 glob + 匹配串 + 替换串 + 是否必须命中
+RULES_FILE = Path(__file__).with_name("patch_rules.json")
+
+# 并行处理的文件数上限（application-*.yaml 数量很少，I/O 为主）
+MAX_WORKERS = 8
+
+# 运行时配置（连接池 / 线程 / 压缩），通过 RUNTIME_PROFILE 选择；不设置或 none 时不修改
+RUNTIME_PROFILES_FILE = Path(__file__).with_name("runtime_profiles.json")
+RUNTIME_PROFILE_ENV = "RUNTIME_PROFILE"
+NO_RUNTIME_PROFILE = "none"
+
+# 块映射里的一行 "key: value # comment"（列表项、文档分隔符不算）
+RE_YAML_KEY = re.compile(r"^( *)([^\s#:'\"\-][^:#]*?):(?:[ \t]+(.*?))?[ \t]*$")
+RE_YAML_COMMENT = re.compile(r"\s+#.*$")
+RE_YAML_PLAIN = re.compile(r"[\w${}./@*,-][\w ${}./@*,:-]*")
+
+
+class PatchRule(NamedTuple):
+    name: str
+    target: str
+    match: str
+    replace: str
+    required: bool
+
+
+class PatchResult(NamedTuple):
+    path: Path
+    hits: dict[str, int]
+    changed: bool
+
+
+def load_rules(rules_file: Path) -> list[PatchRule]:
+    data = json.loads(rules_file.read_text(encoding="utf-8"))
+    rules = []
+    seen = set()
+    for item in data["rules"]:
+        rule = PatchRule(
+            name=item["name"],
+            target=item["target"],
+            match=item["match"],
+            replace=item.get("replace", ""),
+            required=bool(item.get("required", False)),
+        )
+        if not rule.match:
+            raise ValueError(f"规则 {rule.name} 的 match 不能为空")
+        if rule.name in seen:
+            raise ValueError(f"规则名重复: {rule.name}")
+        seen.add(rule.name)
+        rules.append(rule)
+    return rules
+
+
+@lru_cache(maxsize=None)
+def compile_rules(rules: tuple[PatchRule, ...]) -> tuple[re.Pattern, dict[str, PatchRule]]:
+    """
+    把作用于同一文件的规则编译成一个正则，一次扫描完成全部替换。
+    长匹配串排在前面，避免同一位置被较短的规则抢先命中。
+    """
+    by_match: dict[str, PatchRule] = {}
+    for rule in rules:
+        if rule.match in by_match:
+            raise ValueError(f"规则 {by_match[rule.match].name} 与 {rule.name} 的 match 相同")
+        by_match[rule.match] = rule
+    ordered = sorted(by_match, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(m) for m in ordered))
+    return pattern, by_match
+
+
+def collect_targets(root: Path, rules: list[PatchRule]) -> dict[Path, tuple[PatchRule, ...]]:
+    """按目标 glob 展开规则：文件 -> 作用于它的规则（保持规则文件中的顺序）。"""
+    targets: dict[Path, list[PatchRule]] = {}
+    for rule in rules:
+        for path in sorted(root.glob(rule.target)):
+            if path.is_file():
+                targets.setdefault(path, []).append(rule)
+    return {p: tuple(rs) for p, rs in sorted(targets.items())}
+
+
+def patch_file(path: Path, rules: tuple[PatchRule, ...]) -> PatchResult:
+    pattern, by_match = compile_rules(rules)
+    hits = {rule.name: 0 for rule in rules}
+
+    def repl(m: re.Match) -> str:
+        rule = by_match[m.group(0)]
+        hits[rule.name] += 1
+        return rule.replace
+
+    with span("patch file", cat="fs", file=str(path)):
+        content = path.read_text(encoding="utf-8")
+        new_content = pattern.sub(repl, content)
+        changed = new_content != content
+        if changed:
+            write_text(path, new_content)
+    return PatchResult(path=path, hits=hits, changed=changed)
+
+
+def patch_all(root: Path, rules: list[PatchRule]) -> list[PatchResult]:
+    targets = collect_targets(root, rules)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        return list(pool.map(lambda item: patch_file(*item), targets.items()))
+
+
+def report(rules: list[PatchRule], results: list[PatchResult]) -> list[str]:
+    """打印每个文件的命中情况，返回未命中的必需规则（规则名@文件）。"""
+    missed_required = []
+    by_name = {r.name: r for r in rules}
+
+    for res in results:
+        total = sum(res.hits.values())
+        if res.changed:
+            print(f"✅ {res.path}: {total} 处替换")
+        else:
+            print(f"⚠️  {res.path}: 没有任何规则命中")
+        for name, count in res.hits.items():
+            if count:
+                print(f"  ➜ {name} × {count}")
+
+        for name, count in res.hits.items():
+            if count:
+                continue
+            if by_name[name].required:
+                print(f"  ❌ 必需规则未命中: {name}")
+                missed_required.append(f"{name}@{res.path}")
+            else:
+                print(f"  ℹ️  可选规则未命中: {name}")
+
+    # 目标文件不存在（如被模块配置裁掉）时与原来一样只提示，不算未命中
+    matched = {name for res in results for name in res.hits}
+    for rule in rules:
+        if rule.name not in matched:
+            print(f"⚠️  配置文件不存在: {rule.target}（规则 {rule.name} 跳过）")
+
+    return missed_required
+
+
+# ---------- 运行时配置 ----------
+class RuntimeSetting(NamedTuple):
+    path: tuple[str, ...]
+    mode: str   # set：键必须已存在，原地改值；add：键必须不存在，插入到已存在的上级键下
+    value: object
+
+
+class RuntimeProfile(NamedTuple):
+    name: str
+    target: str
+    settings: tuple[RuntimeSetting, ...]
+
+
+class YamlKey(NamedTuple):
+    line: int
+    indent: int
+    value: str  # 行内的值（不含注释）；为空表示下面是子映射
+
+
+def load_runtime_profile(spec: str | None, profiles_file: Path = RUNTIME_PROFILES_FILE) -> RuntimeProfile | None:
+    """按名称加载；spec 为空时读取 RUNTIME_PROFILE，未设置或为 none 时返回 None。"""
+    spec = spec or os.environ.get(RUNTIME_PROFILE_ENV) or NO_RUNTIME_PROFILE
+    if spec == NO_RUNTIME_PROFILE:
+        return None
+    data = json.loads(profiles_file.read_text(encoding="utf-8"))
+    if spec not in data["profiles"]:
+        raise ValueError(f"未知的运行时配置: {spec}（可选: {', '.join([NO_RUNTIME_PROFILE, *data['profiles']])}）")
+
+    settings = []
+    for item in data["settings"]:
+        if item["mode"] not in ("set", "add"):
+            raise ValueError(f"{item['path']}: mode 只能是 set 或 add")
+        missing = [name for name in data["profiles"] if name not in item["values"]]
+        if missing:
+            raise ValueError(f"{item['path']}: 缺少配置 {', '.join(missing)} 的取值")
+        settings.append(RuntimeSetting(tuple(item["path"].split(".")), item["mode"], item["values"][spec]))
+    return RuntimeProfile(spec, data["target"], tuple(settings))
+
+
+def index_yaml(lines: list[str]) -> dict[tuple[str, ...], YamlKey]:
+    """块映射中每个键的路径 -> 位置；多文档时同一路径取第一次出现。"""
+    keys: dict[tuple[str, ...], YamlKey] = {}
+    stack: list[tuple[int, str]] = []
+    for i, line in enumerate(lines):
+        if line.startswith("---"):
+            stack = []
+            continue
+        m = RE_YAML_KEY.match(line)
+        if not m:
+            continue
+        indent = len(m.group(1))
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        stack.append((indent, m.group(2)))
+        value = RE_YAML_COMMENT.sub("", m.group(3) or "")
+        keys.setdefault(tuple(k for _, k in stack), YamlKey(i, indent, value))
+    return keys
+
+
+def block_end(lines: list[str], key: YamlKey) -> int:
+    """key 的块之后第一行的行号（不含块尾的空行 / 注释）。"""
+    end = key.line + 1
+    for i in range(key.line + 1, len(lines)):
+        line = lines[i]
+        if line.startswith("---"):
+            break
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if len(line) - len(line.lstrip(" ")) <= key.indent and not stripped.startswith("- "):
+            break
+        end = i + 1
+    return end
+
+
+def yaml_scalar(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if RE_YAML_PLAIN.fullmatch(text) and ": " not in text:
+        return text
+    return json.dumps(text, ensure_ascii=False)
+
+
+def yaml_entry(indent: int, key: str, value) -> list[str]:
+    if isinstance(value, str) and "\n" in value:
+        return [f"{' ' * indent}{key}: |", *(f"{' ' * (indent + 2)}{ln}" for ln in value.rstrip("\n").split("\n"))]
+    return [f"{' ' * indent}{key}: {yaml_scalar(value)}"]
+
+
+def apply_setting(lines: list[str], setting: RuntimeSetting) -> str | None:
+    """修改 lines；键与 YAML 现状不符时返回问题描述，不修改。"""
+    keys = index_yaml(lines)
+    dotted = ".".join(setting.path)
+    found = keys.get(setting.path)
+
+    if setting.mode == "set":
+        if found is None:
+            return f"{dotted}: 键不存在（set 只修改已有的键）"
+        if not found.value or found.value in ("|", ">"):
+            return f"{dotted}: 不是单行标量，不能 set"
+        if isinstance(setting.value, str) and "\n" in setting.value:
+            return f"{dotted}: set 只支持单行值"
+        m = RE_YAML_KEY.match(lines[found.line])
+        comment = m.group(3)[len(found.value):] if m.group(3) else ""
+        lines[found.line] = f"{' ' * found.indent}{setting.path[-1]}: {yaml_scalar(setting.value)}{comment}"
+        return None
+
+    if found is not None:
+        return f"{dotted}: 键已存在（add 只插入新键，已有的键请用 set）"
+    depth = max((n for n in range(1, len(setting.path)) if setting.path[:n] in keys), default=0)
+    if depth == 0:
+        return f"{dotted}: 上级键 {setting.path[0]} 不存在"
+    parent = keys[setting.path[:depth]]
+    if parent.value:
+        return f"{dotted}: 上级键 {'.'.join(setting.path[:depth])} 是标量"
+
+    children = [k.indent for p, k in keys.items() if len(p) == depth + 1 and p[:depth] == setting.path[:depth]]
+    indent = min(children, default=parent.indent + 2)
+    new_lines = [f"{' ' * (indent + 2 * n)}{key}:" for n, key in enumerate(setting.path[depth:-1])]
+    new_lines += yaml_entry(indent + 2 * (len(setting.path) - depth - 1), setting.path[-1], setting.value)
+    end = block_end(lines, parent)
+    lines[end:end] = new_lines
+    return None
+
+
+def apply_runtime_profile(root: Path, profile: RuntimeProfile) -> list[str]:
+    """把运行时配置写入目标 yaml，返回问题列表；有任何问题时不写文件。"""
+    paths = sorted(p for p in root.glob(profile.target) if p.is_file())
+    if not paths:
+        return [f"目标文件不存在: {profile.target}"]
+    problems = []
+    for path in paths:
+        with span("runtime profile", cat="fs", file=str(path)):
+            content = path.read_text(encoding="utf-8")
+            lines = content.split("\n")
+            file_problems = [p for s in profile.settings if (p := apply_setting(lines, s))]
+            if file_problems:
+                problems += [f"{path}: {p}" for p in file_problems]
+                continue
+            new_content = "\n".join(lines)
+            if new_content != content:
+                write_text(path, new_content)
+            print(f"✅ {path}: 运行时配置 {profile.name}（{len(profile.settings)} 项）")
+    return problems
 
-def patch_application_local_yaml():
-    """修改 application-local.yaml 配置文件"""
-    
-    yaml_file = Path("apps/future-server/src/main/resources/application-local.yaml")
-    
-    if not yaml_file.exists():
-        print(f"⚠️  配置文件不存在: {yaml_file}")
-        return
-    
-    print(f"📖 读取配置文件: {yaml_file}")
-    content = yaml_file.read_text(encoding='utf-8')
-    original_content = content  # 保存原始内容用于对比
-    
-    print("🔧 开始修改配置文件...")
-    
-    # 1. 删除 Druid 自动配置排除项
-    print("  ➜ 删除 Druid 自动配置排除项...")
-    content = content.replace(
-        '      - com.alibaba.druid.spring.boot.autoconfigure.DruidDataSourceAutoConfigure # 排除 Druid 的自动配置，使用 dynamic-datasource-spring-boot-starter 配置多数据源\n',
-        ''
-    )
-    
-    # 2. 替换主数据源 MySQL URL 为 PostgreSQL
-    print("  ➜ 替换主数据源 URL 为 PostgreSQL...")
-    content = content.replace(
-        '          url: jdbc:mysql://127.0.0.1:3306/future-vue-pro?useSSL=false&serverTimezone=Asia/Shanghai&allowPublicKeyRetrieval=true&nullCatalogMeansCurrent=true&rewriteBatchedStatements=true # MySQL Connector/J 8.X 连接的示例',
-        '          url: jdbc:mysql://${DB_HOST}:3306/future-vue-pro?useSSL=false&serverTimezone=Asia/Shanghai&allowPublicKeyRetrieval=true&nullCatalogMeansCurrent=true&rewriteBatchedStatements=true # MySQL Connector/J 8.X 连接的示例'
-#         '          url: jdbc:postgresql://:5432/future-vue-pro'
-    )
-    
-    # 4. 替换主数据源用户名密码
-    print("  ➜ 替换主数据源用户名密码...")
-    # 精确匹配包含正确缩进的行
-    content = content.replace(
-        '          username: root\n          password: 123456\n          #          username: sa',
-        '          username: ${DB_USERNAME}\n          password: ${DB_PASSWORD}\n          #          username: sa'
-    )
-    
-    # 5. 修改 Redis 配置
-    print("  ➜ 修改 Redis 配置...")
-    # 修改为 spring.data.redis
-    content = content.replace(
-        '  # Redis 配置。Redisson 默认的配置足够使用，一般不需要进行调优\n  redis:',
-        '  # Redis 配置。Redisson 默认的配置足够使用，一般不需要进行调优\n  data:\n    redis:'
-    )
-    
-    # 修改 Redis host
-    content = content.replace(
-        '    host: 127.0.0.1 # 地址',
-        '      host: ${REDIS_HOST} # 地址'
-    )
-    
-    # 修改 Redis port
-    content = content.replace(
-        '    port: 6379 # 端口',
-        '      port: 6379 # 端口'
-    )
-    
-    # 修改 Redis database
-    content = content.replace(
-        '    database: 0 # 数据库索引',
-        '      database: 0 # 数据库索引'
-    )
-    
-    # 取消注释并设置 Redis password
-    content = content.replace(
-        '#      password: dev # 密码，建议生产环境开启',
-        '        password: ${REDIS_PASSWORD} # 密码，建议生产环境开启'
-    )
-    
-    # 6. 修改配置前缀
-    print("  ➜ 修改配置前缀 yudao -> future...")
-    content = content.replace('yudao:', 'future:')
-    content = content.replace('芋道相关配置', 'Future相关配置')
-    
-    # 7. 修改日志包名
-    print("  ➜ 修改日志包名...")
-    content = content.replace('cn.iocoder.yudao.module.', 'cn.iocoder.future.module.')
-    
-    # 8. 修改密码示例
-    print("  ➜ 修改密码示例...")
-    content = content.replace('Yudao@2024', 'Future@2024')
-    
-    # 检查是否有修改
-    if content == original_content:
-        print("⚠️  警告：文件内容没有任何变化，可能模板已经改变")
-    else:
-        changes = sum(1 for a, b in zip(original_content, content) if a != b)
-        print(f"✅ 文件已修改 ({changes} 个字符变更)")
-    
-    # 写入文件
-    print(f"💾 写入配置文件...")
-    yaml_file.write_text(content, encoding='utf-8')
-    print(f"✅ 配置文件修改完成: {yaml_file}")
 
 def main():
-    print("🚀 开始修改 application-local.yaml 配置")
-    
+    parser = argparse.ArgumentParser(description="按规则文件修改 application-*.yaml 配置")
+    parser.add_argument("--rules", type=Path, default=RULES_FILE, help="补丁规则文件 (JSON)")
+    parser.add_argument("--runtime-profile", help="运行时配置名（默认读取 RUNTIME_PROFILE，none 表示不修改）")
+    args = parser.parse_args()
+
+    print("🚀 开始修改 application-*.yaml 配置")
+
     try:
-        patch_application_local_yaml()
+        rules = load_rules(args.rules)
+        runtime = load_runtime_profile(args.runtime_profile)
+        print(f"📋 加载规则 {len(rules)} 条: {args.rules}")
+        results = patch_all(Path("."), rules)
+        missed_required = report(rules, results)
     except Exception as e:
         print(f"❌ 错误: {e}")
         import traceback
         traceback.print_exc()
         return 1
-        
+
+    if missed_required:
+        print(f"❌ {len(missed_required)} 条必需规则未命中，模板可能已经改变")
+        return 1
+
+    # 运行时配置作用于补丁之后的结构（如 spring.data.redis）
+    if runtime is not None:
+        print(f"📋 运行时配置: {runtime.name}")
+        problems = apply_runtime_profile(Path("."), runtime)
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        if problems:
+            print(f"❌ {len(problems)} 项运行时配置与 yaml 不符，模板可能已经改变")
+            return 1
+
     print("🎉 配置文件修改完成！")
     return 0
 
+
 if __name__ == "__main__":
-    exit(main())
+    exit(profiling.run(main))
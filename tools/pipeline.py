@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+转换流水线调度器。
+
+每个阶段声明自己读写的路径模式（相对仓库根的 glob，支持 **）。
+调度器按声明顺序建 DAG：两个阶段的读写集合有冲突时，后声明的依赖先声明的；
+没有冲突的阶段并发执行。运行时对比阶段前后的文件快照，
+发现写到声明范围之外的文件就让流水线失败。
+
+指定状态目录（--state 或 CLONEBOT_STATE）时每个阶段完成后写检查点，阶段的文件操作记日志，
+失败的阶段会被回滚；--resume 跳过输入未变的已完成阶段（见 checkpoint.py）。
+
+用法（在待处理的仓库根目录）：
+    python3 ../tools/pipeline.py                      # 跑全部阶段
+    python3 ../tools/pipeline.py --stages replace_all,uncomment_maven
+    python3 ../tools/pipeline.py --state ../repo_content.state --resume
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import profiling
+from checkpoint import (
+    JOURNAL_ENV, STATE_ENV, Checkpoint, CheckpointMismatch, digest, file_digest, journal_paths, journal_scope,
+    rollback, toolchain_digest, tree_manifest,
+)
+from staging import write_text
+from tracing import span
+
+TOOLS_DIR = Path(__file__).resolve().parent
+TEMPLATE_WORKFLOW = TOOLS_DIR.parent / "templates" / "workflows" / "maven.yml"
+TEMPLATE_SCRIPTS = TOOLS_DIR.parent / "templates" / "scripts"
+TEMPLATE_DEPLOY = TOOLS_DIR.parent / "templates" / "deploy"
+CI_WORKFLOW = Path(".github/workflows/maven.yml")
+CI_SCRIPTS = Path(".github/scripts")
+CI_DEPLOY = Path(".github/deploy")
+
+DEFAULT_JOBS = 4
+
+# --resume 无法原地恢复时的退出码：调用方应换一棵新的来源树重新运行
+EXIT_CANNOT_RESUME = 3
+
+# 快照时跳过的目录（git 元数据 / 构建产物不属于任何阶段的输出）
+SNAPSHOT_SKIP_DIRS = {".git", "target", "__pycache__"}
+
+# 影响转换结果的环境变量：计入检查点 key，变了就不能跳过已完成的阶段
+STAGE_ENV = ("MODULE_PROFILE", "REPLACE_TOKENS", "RUNTIME_PROFILE")
+
+
+class StageFailed(Exception):
+    pass
+
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable[[Path, dict], str]  # (仓库根, 环境变量) -> 输出文本
+    reads: tuple[str, ...]
+    writes: tuple[str, ...]
+
+
+class StageRun(NamedTuple):
+    name: str
+    ok: bool
+    start: float
+    end: float
+    output: str
+    violations: list[str]
+
+
+# ---------- 阶段实现 ----------
+def tool(script: str) -> Callable[[Path, dict], str]:
+    def run(root: Path, env: dict) -> str:
+        proc = subprocess.run(
+            [sys.executable, str(TOOLS_DIR / script)],
+            cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        if proc.returncode != 0:
+            raise StageFailed(proc.stdout + f"\n{script} exited with {proc.returncode}")
+        return proc.stdout
+    run.script = script  # clonebot chain 据此在进程内直接调用工具
+    return run
+
+
+def traced_stage(stage: Stage, root: Path, env: dict) -> str:
+    with span(stage.name, cat="stage"), journal_scope(env.get(JOURNAL_ENV)):
+        return stage.run(root, env)
+
+
+def install_ci_template(root: Path, env: dict) -> str:
+    # 走 write_text：目标若与上游共享 inode 会先断开硬链接，带检查点时也会记日志
+    dst = root / CI_WORKFLOW
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    write_text(dst, TEMPLATE_WORKFLOW.read_text(encoding="utf-8"))
+    lines = [f"✅ installed CI workflow: {CI_WORKFLOW}"]
+
+    # workflow 调用的辅助脚本（构建计划等）与部署到服务器的文件（Dockerfile 等）
+    for src_dir, dst_dir in ((TEMPLATE_SCRIPTS, CI_SCRIPTS), (TEMPLATE_DEPLOY, CI_DEPLOY)):
+        files = sorted(p for p in src_dir.iterdir() if p.is_file())
+        if files:
+            (root / dst_dir).mkdir(parents=True, exist_ok=True)
+        for src in files:
+            write_text(root / dst_dir / src.name, src.read_text(encoding="utf-8"))
+            lines.append(f"✅ installed CI file: {dst_dir / src.name}")
+    return "\n".join(lines) + "\n"
+
+
+# 声明顺序即冲突时的执行顺序
+STAGES = [
+    Stage("prune_modules", tool("module_profile.py"),
+          reads=("**/pom.xml",),
+          writes=("*-module-*/**", "**/pom.xml")),
+    Stage("replace_all", tool("replace_all.py"),
+          reads=("**",),
+          writes=("**",)),
+    Stage("uncomment_maven", tool("uncomment_maven.py"),
+          reads=("**/pom.xml",),
+          writes=("**/pom.xml",)),
+    Stage("ci_template", install_ci_template,
+          reads=(),
+          writes=(str(CI_WORKFLOW), f"{CI_SCRIPTS}/**", f"{CI_DEPLOY}/**")),
+    Stage("restructure_layout", tool("restructure_layout.py"),
+          reads=("pom.xml", "*-dependencies/**", "*-framework/**", "*-server/**", "*-module-*/**",
+                 "platform/**", "apps/**", "modules/**"),
+          writes=("pom.xml", "*-dependencies/**", "*-framework/**", "*-server/**", "*-module-*/**",
+                  "platform/**", "apps/**", "modules/**")),
+    Stage("split_api_biz", tool("split_api_biz.py"),
+          reads=("**/pom.xml", "modules/**"),
+          writes=("**/pom.xml", "modules/**")),
+    # 并行度取决于拆分后的最终 reactor，读全部 pom，因此排在 split_api_biz 之后
+    Stage("maven_config", tool("maven_config.py"),
+          reads=("**/pom.xml", ".mvn/**"),
+          writes=(".mvn/**",)),
+    Stage("patch_application_local", tool("patch_application_local.py"),
+          reads=("apps/*/src/main/resources/application-*.yaml",),
+          writes=("apps/*/src/main/resources/application-*.yaml",)),
+    # 只读的不变量检查：读全树，因此排在所有写阶段之后，失败则不会进入 create / push
+    Stage("validate_tree", tool("validate_tree.py"),
+          reads=("**",),
+          writes=()),
+]
+
+
+# ---------- 路径模式 ----------
+@lru_cache(maxsize=None)
+def pattern_regex(pattern: str) -> re.Pattern:
+    """glob -> 正则：** 匹配任意层目录，* / ? 不跨越 /。"""
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+def path_matches(path: str, patterns: tuple[str, ...]) -> bool:
+    return any(pattern_regex(p).match(path) for p in patterns)
+
+
+def _segment_overlap(a: str, b: str) -> bool:
+    if not any(c in a for c in "*?["):
+        return fnmatchcase(a, b)
+    if not any(c in b for c in "*?["):
+        return fnmatchcase(b, a)
+    return True  # 两边都带通配符：保守认为可能重叠
+
+
+@lru_cache(maxsize=None)
+def _segments_overlap(a: tuple[str, ...], b: tuple[str, ...]) -> bool:
+    if not a or not b:
+        rest = a or b
+        return all(s == "**" for s in rest)
+    if a[0] == "**":
+        return _segments_overlap(a[1:], b) or _segments_overlap(a, b[1:])
+    if b[0] == "**":
+        return _segments_overlap(a, b[1:]) or _segments_overlap(a[1:], b)
+    return _segment_overlap(a[0], b[0]) and _segments_overlap(a[1:], b[1:])
+
+
+def patterns_overlap(a: tuple[str, ...], b: tuple[str, ...]) -> bool:
+    """两组 glob 是否可能匹配到同一路径（无法判定时按重叠处理）。"""
+    return any(
+        _segments_overlap(tuple(pa.split("/")), tuple(pb.split("/")))
+        for pa in a for pb in b
+    )
+
+
+def conflicts(first: Stage, second: Stage) -> bool:
+    return (
+        patterns_overlap(first.writes, second.reads + second.writes)
+        or patterns_overlap(first.reads, second.writes)
+    )
+
+
+def build_dag(stages: list[Stage]) -> dict[str, set[str]]:
+    """阶段名 -> 必须先完成的阶段名。"""
+    deps: dict[str, set[str]] = {}
+    for i, stage in enumerate(stages):
+        deps[stage.name] = {prev.name for prev in stages[:i] if conflicts(prev, stage)}
+    return deps
+
+
+# ---------- 运行时校验 ----------
+def snapshot(root: Path) -> dict[str, tuple[int, int, int]]:
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SNAPSHOT_SKIP_DIRS]
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                st = os.lstat(full)
+            except FileNotFoundError:
+                continue
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            files[rel] = (st.st_ino, st.st_size, st.st_mtime_ns)
+    return files
+
+
+def changed_paths(before: dict, after: dict) -> set[str]:
+    return {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+
+
+def covered(rel: str, paths: set[str]) -> bool:
+    """rel 本身或它的某个上级目录在 paths 中（目录整体移动时日志只记目录）。"""
+    parts = rel.split("/")
+    return any("/".join(parts[:i]) in paths for i in range(len(parts), 0, -1))
+
+
+def own_changes(changed: set[str], own: set[str], concurrent: set[str]) -> set[str]:
+    """
+    快照对比得到的是整棵树的改动，包含同时运行的阶段写的文件。
+    按操作日志归属：同时运行的阶段日志里记过、本阶段没记过的路径不算本阶段的改动；
+    其余（本阶段记过的、谁都没记过的）都按本阶段自己的 writes 检查。
+    """
+    return {p for p in changed if covered(p, own) or not covered(p, concurrent)}
+
+
+# ---------- 检查点 ----------
+def stage_keys(stages: list[Stage], deps: dict[str, set[str]], env: dict, source: str) -> dict[str, str]:
+    """阶段的输入标识：工具代码、相关环境变量、来源树，以及前置阶段的 key。"""
+    keys: dict[str, str] = {}
+    settings = {k: env.get(k) for k in STAGE_ENV}
+    for stage in stages:
+        keys[stage.name] = digest(stage.name, toolchain_digest(), settings, source,
+                                  sorted(keys[d] for d in deps[stage.name]))
+    return keys
+
+
+def prepare_checkpoint(root: Path, stages: list[Stage], deps: dict[str, set[str]], env: dict,
+                       ckpt: Checkpoint, resume: bool, out) -> tuple[dict[str, str], set[str]]:
+    """
+    resume 时先回滚上次中断的阶段；返回 (各阶段 key, 可以跳过的阶段)。
+    不带 resume 表示 root 是一棵新的来源树，旧的日志与阶段记录都作废。
+    不能原地恢复时抛 CheckpointMismatch。
+    """
+    if resume:
+        for name, count in ckpt.recover().items():
+            print(f"↩️  {name}: 回滚了上次中断留下的 {count} 个文件操作", file=out)
+    else:
+        ckpt.discard_journals()
+
+    names = [s.name for s in stages]
+    if not resume or ckpt.tree is None or not any(ckpt.recorded(n) for n in names):
+        ckpt.start_tree(tree_manifest(root, SNAPSHOT_SKIP_DIRS), names)
+        return stage_keys(stages, deps, env, ckpt.data["source"]), set()
+
+    actual = tree_manifest(root, SNAPSHOT_SKIP_DIRS)
+    differ = sorted(p for p in actual.keys() | ckpt.tree.keys() if actual.get(p) != ckpt.tree.get(p))
+    if differ:
+        raise CheckpointMismatch(f"树与检查点不一致（{len(differ)} 个文件，例如 {differ[0]}）")
+    keys = stage_keys(stages, deps, env, ckpt.data["source"])
+    skip = {n for n in names if ckpt.done(n, keys[n])}
+    stale = [n for n in names if ckpt.recorded(n) and n not in skip]
+    if stale:
+        raise CheckpointMismatch(f"已完成阶段的输入变了（工具 / 模板 / 环境变量）: {', '.join(stale)}")
+    return keys, skip
+
+
+# ---------- 调度 ----------
+def run_pipeline(root: Path, stages: list[Stage], env: dict | None = None,
+                 jobs: int = DEFAULT_JOBS, verify: bool = True, out=sys.stdout,
+                 state: Path | None = None, resume: bool = False) -> bool:
+    env = env if env is not None else dict(os.environ)
+    deps = build_dag(stages)
+    by_name = {s.name: s for s in stages}
+    t0 = time.perf_counter()
+
+    ckpt = Checkpoint(state) if state is not None else None
+    keys, skipped = prepare_checkpoint(root, stages, deps, env, ckpt, resume, out) if ckpt else ({}, set())
+    for name in sorted(skipped, key=[s.name for s in stages].index):
+        print(f"⏭️  {name}: 已完成（检查点）", file=out)
+
+    pending = [s.name for s in stages if s.name not in skipped]
+    done: set[str] = set(skipped)
+    running: dict = {}             # future -> 阶段名
+    overlap: dict[str, set[str]] = {}  # 阶段名 -> 其运行期间同时在跑的阶段
+    before: dict[str, dict] = {}
+    starts: dict[str, float] = {}
+    runs: list[StageRun] = []
+    written: dict[str, set[str]] = {}  # 已结束阶段的操作日志路径（相对 root）
+    failed = False
+
+    # 按操作日志把改动归属到阶段；不带检查点时日志放在临时目录，用完即删
+    scratch = Path(tempfile.mkdtemp(prefix="clonebot-journal-")) if verify and not ckpt else None
+
+    def journal_dir(name: str) -> Path:
+        return ckpt.journal_dir(name) if ckpt else scratch / name
+
+    def logged(name: str) -> set[str]:
+        if name in written:
+            return written[name]
+        return {os.path.relpath(p, root.resolve()).replace(os.sep, "/") for p in journal_paths(journal_dir(name))}
+
+    for name in pending:
+        if deps[name] - done:
+            print(f"🔗 {name} <- {', '.join(sorted(deps[name]))}", file=out)
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while pending or running:
+                if not failed:
+                    for name in [n for n in pending if deps[n] <= done]:
+                        if len(running) >= jobs:
+                            break
+                        pending.remove(name)
+                        stage_env = env
+                        if verify or ckpt:
+                            stage_env = {**env, JOURNAL_ENV: str(journal_dir(name))}
+                            before[name] = snapshot(root)
+                        overlap[name] = set(running.values())
+                        for other in running.values():
+                            overlap[other].add(name)
+                        starts[name] = time.perf_counter() - t0
+                        running[pool.submit(traced_stage, by_name[name], root, stage_env)] = name
+                elif not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    end = time.perf_counter() - t0
+                    try:
+                        output, ok = fut.result(), True
+                    except Exception as e:
+                        output, ok = str(e), False
+
+                    violations, changed = [], set()
+                    if verify or ckpt:
+                        changed = changed_paths(before.pop(name), snapshot(root))
+                    if verify:
+                        # 只按本阶段自己的 writes 检查；同时运行的阶段只作为报告里的上下文
+                        written[name] = logged(name)
+                        concurrent = set().union(*(logged(other) for other in overlap[name]))
+                        mine = own_changes(changed, written[name], concurrent)
+                        violations = sorted(p for p in mine if not path_matches(p, by_name[name].writes))
+
+                    run = StageRun(name, ok and not violations, starts[name], end, output, violations)
+                    if ckpt:
+                        commit_stage(ckpt, by_name[name], keys[name], run, changed, root, out)
+                    runs.append(run)
+                    print_stage(run, overlap[name], out)
+                    if not run.ok:
+                        failed = True
+                    done.add(name)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print_timeline(runs, out)
+    return not failed and not pending
+
+
+def commit_stage(ckpt: Checkpoint, stage: Stage, key: str, run: StageRun, changed: set[str], root: Path, out):
+    """成功：记录检查点再丢弃日志；失败：按日志回滚，树回到上一个检查点。"""
+    journal = ckpt.journal_dir(stage.name)
+    if run.ok:
+        # 并发阶段的写集合互不重叠，按声明的 writes 归属改动的文件
+        outputs = {p: file_digest(root / p) for p in sorted(changed) if path_matches(p, stage.writes)}
+        ckpt.record(stage.name, key, outputs)
+        shutil.rmtree(journal, ignore_errors=True)
+    elif journal.exists():
+        print(f"↩️  {stage.name}: 已回滚 {rollback(journal)} 个文件操作", file=out)
+
+
+def print_stage(run: StageRun, overlapped: set[str], out):
+    print(f"\n===== {run.name} =====", file=out)
+    print(run.output.rstrip(), file=out)
+    for p in run.violations[:20]:
+        print(f"❌ {run.name}: wrote outside declared set: {p}", file=out)
+    if len(run.violations) > 20:
+        print(f"❌ {run.name}: ... {len(run.violations) - 20} more", file=out)
+    if run.violations and overlapped:
+        print(f"   (concurrent with: {', '.join(sorted(overlapped))})", file=out)
+
+
+def print_timeline(runs: list[StageRun], out):
+    print("\n⏱️  stage timeline:", file=out)
+    for r in sorted(runs, key=lambda r: r.start):
+        mark = "✅" if r.ok else "❌"
+        print(f"  {mark} {r.name:<26} {r.start:7.2f}s -> {r.end:7.2f}s  ({r.end - r.start:.2f}s)", file=out)
+
+
+def select_stages(names: str | None) -> list[Stage]:
+    if not names:
+        return list(STAGES)
+    wanted = [n.strip() for n in names.split(",") if n.strip()]
+    known = {s.name for s in STAGES}
+    unknown = [n for n in wanted if n not in known]
+    if unknown:
+        raise ValueError(f"未知阶段: {', '.join(unknown)}（可选: {', '.join(sorted(known))}）")
+    return [s for s in STAGES if s.name in wanted]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按读写声明并发执行转换阶段")
+    parser.add_argument("--stages", help="逗号分隔的阶段名（默认全部，按声明顺序）")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="最大并发阶段数")
+    parser.add_argument("--no-verify", action="store_true", help="不校验阶段的实际写入范围")
+    parser.add_argument("--state", type=Path, default=os.environ.get(STATE_ENV) or None,
+                        help=f"检查点状态目录（默认 ${STATE_ENV}；不能在仓库目录内）")
+    parser.add_argument("--resume", action="store_true", help="跳过输入未变的已完成阶段")
+    args = parser.parse_args()
+
+    state = Path(args.state).resolve() if args.state else None
+    if args.resume and state is None:
+        print(f"❌ --resume 需要 --state 或 {STATE_ENV}")
+        return 1
+    if state is not None and state.is_relative_to(Path(".").resolve()):
+        print(f"❌ 状态目录不能在仓库目录内: {state}")
+        return 1
+
+    try:
+        stages = select_stages(args.stages)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🚀 流水线: {', '.join(s.name for s in stages)}")
+    try:
+        ok = run_pipeline(Path("."), stages, jobs=args.jobs, verify=not args.no_verify,
+                          state=state, resume=args.resume)
+    except CheckpointMismatch as e:
+        print(f"❌ 不能从检查点恢复: {e}\n   请从新的上游副本重新运行（不带 --resume）")
+        return EXIT_CANNOT_RESUME
+    if not ok:
+        print("❌ 流水线失败")
+        return 1
+    print("🎉 流水线完成！")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+所有工具通用的性能剖析模式。
+
+每个工具的入口都经过 profiling.run(main)，因此都支持：
+    --profile[=DIR]     用 cProfile 运行，输出 DIR/<工具>-<pid>.pstats 和热点函数报告 .txt
+                        （DIR 默认为 Clone-Bot 根目录下的 profiles/）
+    --profile-memory    同时用 tracemalloc 记录峰值内存与峰值时刻的主要分配位置
+    --profile-top=N     报告中列出的条目数（默认 25）
+
+这些参数在工具自己的参数解析之前被取走，并写入环境变量，
+pipeline / batch_provision 拉起的子工具会自动以同样的方式剖析。
+cProfile 只统计主线程；线程池里的工作（如 pipeline 的各阶段）都在子工具进程里，各自有报告。
+
+    python3 ../tools/pipeline.py --profile --profile-memory
+    python3 -m pstats profiles/split_api_biz-1234.pstats
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_ENV = "CLONEBOT_PROFILE"          # 输出目录；设置即启用
+PROFILE_MEMORY_ENV = "CLONEBOT_PROFILE_MEMORY"
+PROFILE_TOP_ENV = "CLONEBOT_PROFILE_TOP"
+
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / "profiles"
+DEFAULT_TOP = 25
+
+# 峰值采样：当前内存超过上次快照时峰值的 10% 才重新拍快照，避免频繁遍历
+SAMPLE_INTERVAL = 0.05
+SAMPLE_GROWTH = 1.10
+TRACEMALLOC_FRAMES = 1
+
+
+def take_profile_args(argv: list[str]) -> list[str]:
+    """从 argv 中取走 --profile* 参数，写入环境变量；返回剩余参数。"""
+    rest = []
+    for arg in argv:
+        if arg == "--profile" or arg.startswith("--profile="):
+            target = arg.partition("=")[2] or str(DEFAULT_DIR)
+            os.environ[PROFILE_ENV] = str(Path(target).resolve())
+        elif arg == "--profile-memory":
+            os.environ[PROFILE_MEMORY_ENV] = "1"
+        elif arg.startswith("--profile-top="):
+            os.environ[PROFILE_TOP_ENV] = arg.partition("=")[2]
+        else:
+            rest.append(arg)
+    if os.environ.get(PROFILE_MEMORY_ENV) and not os.environ.get(PROFILE_ENV):
+        os.environ[PROFILE_ENV] = str(DEFAULT_DIR)
+    return rest
+
+
+class PeakSampler(threading.Thread):
+    """后台线程：内存创新高时拍 tracemalloc 快照，用于定位峰值时刻的分配位置。"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop = threading.Event()
+        self.peak_snapshot: tracemalloc.Snapshot | None = None
+        self.snapshot_size = 0
+
+    def run(self):
+        while not self.stop.wait(SAMPLE_INTERVAL):
+            self.sample()
+
+    def sample(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.snapshot_size * SAMPLE_GROWTH:
+            self.peak_snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+
+def hot_functions(profiler: cProfile.Profile, top: int) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    out.write("== 按累计时间 (cumulative) ==\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    out.write("\n== 按自身时间 (tottime) ==\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+    return out.getvalue()
+
+
+def memory_report(peak: int, sampler: PeakSampler, top: int) -> str:
+    lines = ["== 内存 ==", f"峰值: {peak / 1024 / 1024:.1f} MB"]
+    if sampler.peak_snapshot is not None:
+        snapshot = sampler.peak_snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        lines.append(f"峰值附近（{sampler.snapshot_size / 1024 / 1024:.1f} MB）的主要分配位置:")
+        for stat in snapshot.statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:10.1f} KB  {stat.count:8d} 块  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def run(main) -> int | None:
+    """运行工具入口；启用剖析时在 cProfile（及 tracemalloc）下运行并写出报告。"""
+    sys.argv[1:] = take_profile_args(sys.argv[1:])
+    out_dir = os.environ.get(PROFILE_ENV)
+    if not out_dir:
+        return main()
+
+    tool = Path(sys.argv[0]).stem
+    top = int(os.environ.get(PROFILE_TOP_ENV) or DEFAULT_TOP)
+    memory = bool(os.environ.get(PROFILE_MEMORY_ENV))
+    sampler = PeakSampler()
+    if memory:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        sampler.start()
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        return profiler.runcall(main)
+    finally:
+        elapsed = time.perf_counter() - start
+        report = [f"{tool}: {elapsed:.2f}s\n\n", hot_functions(profiler, top)]
+        if memory:
+            sampler.stop.set()
+            sampler.join()
+            sampler.sample()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report.append("\n" + memory_report(peak, sampler, top))
+
+        base = Path(out_dir) / f"{tool}-{os.getpid()}"
+        base.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(f"{base}.pstats")
+        Path(f"{base}.txt").write_text("".join(report), encoding="utf-8")
+        print(f"📊 profile: {base}.pstats / {base}.txt ({elapsed:.2f}s)", file=sys.stderr)
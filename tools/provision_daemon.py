@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+常驻的建仓服务：上游镜像与预处理结果常驻，新仓库的耗时主要只剩推送。
+
+- 维护 ruoyi-vue-pro 的 bare mirror（work/mirror.git），更新时只 fetch 增量
+- 每个上游 commit 只预处理一次（clone 自镜像 + 与目标无关的共享转换），
+  结果按 commit 缓存为 work/upstream-<sha>，各目标从这里硬链接暂存（见 batch_provision）
+- 预处理树的 pom 索引（路径 -> artifactId）常驻内存，供状态查询
+- 本地 HTTP 接口接收任务，任务排队、并发度有上限
+- 上游更新通知（webhook）触发后台预取与预处理，不必等到有人来建仓
+
+接口（默认只监听 127.0.0.1）：
+    POST /jobs      {"name": "acme-erp", "module_profile": "basic", "runtime_profile": "medium", "sync": true, ...}
+                    字段同 manifest 的 target；sync=true 时先拉取上游最新提交
+    GET  /jobs      全部任务
+    GET  /jobs/<id> 单个任务状态与结果
+    GET  /status    镜像 / 预处理状态、队列长度
+    POST /webhook   上游有更新：后台 fetch 并预处理
+
+用法（在 Clone-Bot 仓库根目录）：
+    python3 tools/provision_daemon.py --port 8765
+    curl -s -X POST localhost:8765/jobs -d '{"name": "acme-erp", "module_profile": "basic"}'
+"""
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+
+import profiling
+from batch_provision import (DEFAULT_CONCURRENCY, Publisher, Target, attach_org_secrets, make_publisher, parse_target,
+                             prepare_upstream, provision_target)
+from fetch_upstream import UPSTREAM_BRANCH, UPSTREAM_URL
+from module_profile import iter_poms, project_artifact_id
+from tracing import span
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 保留的预处理树数量（当前的 + 仍被任务引用的不受此限制）
+KEEP_PREPARED = 2
+
+
+class Job(NamedTuple):
+    id: str
+    target: Target
+    sync: bool
+    status: str               # queued / running / done / failed
+    submitted: float
+    started: float | None = None
+    finished: float | None = None
+    upstream: str | None = None  # 使用的上游 commit
+    result: dict | None = None
+
+
+class Daemon:
+    def __init__(self, work: Path, upstream_url: str, branch: str, pub: Publisher | None, jobs: int):
+        self.work = work
+        self.mirror = work / "mirror.git"
+        self.upstream_url = upstream_url
+        self.branch = branch
+        self.pub = pub
+        self.concurrency = jobs
+
+        self.lock = threading.Lock()             # 保护下面的状态
+        self.prepare_lock = threading.Lock()     # 同一时间只做一次 fetch / 预处理
+        self.prepared: dict[str, Path] = {}      # commit -> 预处理树
+        self.index: dict[str, dict[str, str]] = {}  # commit -> {pom 相对路径: artifactId}
+        self.current: str | None = None
+        self.in_use: Counter = Counter()
+        self.jobs: dict[str, Job] = {}
+        self.active_names: set[str] = set()
+        self.queue: queue.Queue = queue.Queue()
+        self.prefetching = False
+
+    # ---------- 上游镜像 ----------
+    def fetch(self) -> str:
+        """更新 bare mirror，返回分支最新 commit。"""
+        with span("mirror fetch", cat="git"):
+            if not self.mirror.exists():
+                subprocess.run(["git", "clone", "-q", "--mirror", self.upstream_url, str(self.mirror)], check=True)
+            else:
+                subprocess.run(["git", "--git-dir", str(self.mirror), "fetch", "-q", "--prune", "origin"], check=True)
+        out = subprocess.run(
+            ["git", "--git-dir", str(self.mirror), "rev-parse", f"refs/heads/{self.branch}"],
+            check=True, capture_output=True, text=True,
+        )
+        return out.stdout.strip()
+
+    def ensure_prepared(self, refresh: bool, pin: bool = False) -> tuple[str, Path]:
+        """
+        返回 (commit, 预处理树)；refresh 或尚无缓存时先 fetch。
+        pin=True 时在锁内把树计入 in_use（调用方用完后减回），返回之前不会被 collect_garbage 删除。
+        """
+        with self.prepare_lock:
+            sha = self.fetch() if refresh or self.current is None else self.current
+            if sha not in self.prepared:
+                print(f"📥 预处理上游 {sha[:12]}...", flush=True)
+                start = time.perf_counter()
+                tree = prepare_upstream(self.work, self.mirror.resolve().as_uri(), self.branch,
+                                        name=f"upstream-{sha[:12]}")
+                index = {
+                    str(pom.parent.relative_to(tree)): project_artifact_id(pom.read_text(encoding="utf-8")) or ""
+                    for pom in iter_poms(tree)
+                }
+                with self.lock:
+                    self.prepared[sha] = tree
+                    self.index[sha] = index
+                print(f"✅ 上游 {sha[:12]} 就绪（{time.perf_counter() - start:.1f}s，{len(index)} 个 pom）", flush=True)
+            with self.lock:
+                self.current = sha
+                if pin:
+                    self.in_use[sha] += 1
+            self.collect_garbage()
+            return sha, self.prepared[sha]
+
+    def collect_garbage(self):
+        """删除不再使用的旧预处理树。"""
+        with self.lock:
+            stale = [s for s in self.prepared if s != self.current and not self.in_use[s]]
+            drop = stale[: max(0, len(self.prepared) - KEEP_PREPARED)]
+            trees = [self.prepared.pop(s) for s in drop]
+            for s in drop:
+                self.index.pop(s, None)
+        for tree in trees:
+            shutil.rmtree(tree, ignore_errors=True)
+            shutil.rmtree(tree.with_name(f"{tree.name}.state"), ignore_errors=True)
+
+    def prefetch(self):
+        """webhook 触发：后台拉取并预处理，已有预取在进行时忽略。"""
+        with self.lock:
+            if self.prefetching:
+                return
+            self.prefetching = True
+        try:
+            self.ensure_prepared(refresh=True)
+        except Exception as e:
+            print(f"❌ 预取失败: {e}", flush=True)
+        finally:
+            with self.lock:
+                self.prefetching = False
+
+    # ---------- 任务 ----------
+    def submit(self, item: dict) -> Job:
+        target = parse_target(item)
+        with self.lock:
+            if target.name in self.active_names:
+                raise ValueError(f"{target.name} 已有未完成的任务")
+            self.active_names.add(target.name)
+            job = Job(id=uuid.uuid4().hex[:12], target=target, sync=bool(item.get("sync", False)),
+                      status="queued", submitted=time.time())
+            self.jobs[job.id] = job
+        self.queue.put(job.id)
+        return job
+
+    def update(self, job_id: str, **changes) -> Job:
+        with self.lock:
+            job = self.jobs[job_id] = self.jobs[job_id]._replace(**changes)
+            return job
+
+    def worker(self):
+        while True:
+            job = self.update(self.queue.get(), status="running", started=time.time())
+            sha = None
+            try:
+                sha, tree = self.ensure_prepared(refresh=job.sync, pin=True)
+                self.update(job.id, upstream=sha)
+                result = provision_target(job.target, tree, self.work, self.pub)
+                if result.ok and self.pub is not None and self.pub.org_secrets:
+                    try:
+                        attach_org_secrets(self.pub, [job.target.name])
+                    except requests.HTTPError as e:
+                        result = result._replace(ok=False, failed_stage="secrets", error=str(e))
+                self.update(job.id, status="done" if result.ok else "failed", result=result._asdict())
+            except Exception as e:
+                self.update(job.id, status="failed", result={"error": str(e)})
+            finally:
+                with self.lock:
+                    if sha is not None:
+                        self.in_use[sha] -= 1
+                    self.active_names.discard(job.target.name)
+                self.update(job.id, finished=time.time())
+                self.collect_garbage()
+                job = self.jobs[job.id]
+                print(f"{'✅' if job.status == 'done' else '❌'} {job.target.name} [{job.id}] "
+                      f"{job.finished - job.started:.1f}s", flush=True)
+
+    def start(self):
+        for i in range(self.concurrency):
+            threading.Thread(target=self.worker, name=f"worker-{i}", daemon=True).start()
+        threading.Thread(target=self.prefetch, name="prefetch", daemon=True).start()
+
+    # ---------- 查询 ----------
+    def job_json(self, job: Job) -> dict:
+        data = job._asdict()
+        data["target"] = job.target._asdict()
+        return data
+
+    def status_json(self) -> dict:
+        with self.lock:
+            return {
+                "upstream": self.upstream_url,
+                "branch": self.branch,
+                "current": self.current,
+                "prepared": {sha: {"path": str(p), "poms": len(self.index.get(sha, {})), "in_use": self.in_use[sha]}
+                             for sha, p in self.prepared.items()},
+                "prefetching": self.prefetching,
+                "queued": sum(1 for j in self.jobs.values() if j.status == "queued"),
+                "running": sum(1 for j in self.jobs.values() if j.status == "running"),
+                "concurrency": self.concurrency,
+                "local_only": self.pub is None,
+            }
+
+
+def make_handler(daemon: Daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code: int, body: dict | list):
+            data = json.dumps(body, ensure_ascii=False, indent=2).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/status":
+                return self.reply(200, daemon.status_json())
+            if self.path == "/jobs":
+                with daemon.lock:
+                    jobs = list(daemon.jobs.values())
+                return self.reply(200, [daemon.job_json(j) for j in jobs])
+            if self.path.startswith("/jobs/"):
+                job = daemon.jobs.get(self.path.removeprefix("/jobs/"))
+                if job is None:
+                    return self.reply(404, {"error": "job not found"})
+                return self.reply(200, daemon.job_json(job))
+            self.reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path == "/jobs":
+                try:
+                    job = daemon.submit(self.read_json())
+                except (KeyError, ValueError) as e:
+                    return self.reply(400, {"error": str(e)})
+                return self.reply(202, daemon.job_json(job))
+            if self.path == "/webhook":
+                threading.Thread(target=daemon.prefetch, name="prefetch", daemon=True).start()
+                return self.reply(202, {"prefetch": "started"})
+            self.reply(404, {"error": "not found"})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻建仓服务（本地 HTTP 接口）")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--work", type=Path, default=Path("daemon_work"), help="工作目录")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_CONCURRENCY, help="并发任务数")
+    parser.add_argument("--upstream", default=UPSTREAM_URL, help="上游仓库 URL（可用 file:// 本地仓库）")
+    parser.add_argument("--branch", default=UPSTREAM_BRANCH)
+    parser.add_argument("--local-only", action="store_true", help="只做转换，不创建 / 推送 / 复制 secrets")
+    args = parser.parse_args()
+
+    pub = None
+    if not args.local_only:
+        missing = [v for v in ("GH_PAT", "OWNER") if not os.environ.get(v)]
+        if missing:
+            print(f"❌ 缺少必需的环境变量: {', '.join(missing)}")
+            return 1
+        try:
+            pub = make_publisher(os.environ["OWNER"], os.environ["GH_PAT"])
+        except requests.HTTPError as e:
+            print(f"❌ 查询 {os.environ['OWNER']} 失败: {e}")
+            return 1
+
+    work = args.work.resolve()
+    (work / "logs").mkdir(parents=True, exist_ok=True)
+    daemon = Daemon(work, args.upstream, args.branch, pub, args.jobs)
+    daemon.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(daemon))
+    print(f"🚀 listening on http://{args.host}:{args.port}（并发 {args.jobs}，工作目录 {work}）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
@@ -1,6 +1,11 @@
+import json
 import os
 from pathlib import Path
 
+import profiling
+from staging import move, write_text
+from tracing import span
+
 REPLACEMENTS = {
     "yudao": "future",
     "Yudao": "Future",
@@ -12,14 +17,20 @@ REPLACEMENTS = {
 SKIP_DIRS = {".git", ".idea", "target", "node_modules", "__pycache__"}
 
 
-def replace_content(path: Path):
+def load_replacements() -> dict[str, str]:
+    """环境变量 REPLACE_TOKENS（JSON 对象）可以整体替换默认的 REPLACEMENTS。"""
+    raw = os.environ.get("REPLACE_TOKENS")
+    return json.loads(raw) if raw else REPLACEMENTS
+
+
+def replace_content(path: Path, replacements: dict[str, str] = REPLACEMENTS):
     try:
         text = path.read_text(encoding="utf-8")
         new_text = text
-        for old, new in REPLACEMENTS.items():
+        for old, new in replacements.items():
             new_text = new_text.replace(old, new)
         if new_text != text:
-            path.write_text(new_text, encoding="utf-8")
+            write_text(path, new_text)
             print(f"✅ 内容替换: {path}")
     except UnicodeDecodeError:
         print(f"⚠️  跳过二进制文件: {path}")
@@ -27,9 +38,9 @@ def replace_content(path: Path):
         print(f"❌ 处理失败 {path}: {e}")
 
 
-def rename_path(path: Path) -> Path:
+def rename_path(path: Path, replacements: dict[str, str] = REPLACEMENTS) -> Path:
     new_name = path.name
-    for old, new in REPLACEMENTS.items():
+    for old, new in replacements.items():
         new_name = new_name.replace(old, new)
     if new_name == path.name:
         return path
@@ -37,20 +48,21 @@ def rename_path(path: Path) -> Path:
     if new_path.exists():
         print(f"⚠️  跳过重命名，目标已存在: {path}")
         return path
-    path.rename(new_path)
+    move(path, new_path)
     print(f"✅ 重命名: {path} -> {new_path}")
     return new_path
 
 
-def process(root: Path):
+def process(root: Path, replacements: dict[str, str] = REPLACEMENTS):
     # 先替换文件内容（深度优先收集，避免目录改名后路径失效）
     all_files = sorted(
         (p for p in root.rglob("*") if p.is_file()
          and not any(part in SKIP_DIRS for part in p.parts)),
         key=lambda p: len(p.parts),
     )
-    for f in all_files:
-        replace_content(f)
+    with span("replace contents", cat="fs", files=len(all_files)):
+        for f in all_files:
+            replace_content(f, replacements)
 
     # 从最深层开始重命名（避免父目录改名后子路径失效）
     all_paths = sorted(
@@ -58,19 +70,21 @@ def process(root: Path):
          if not any(part in SKIP_DIRS for part in p.parts)),
         key=lambda p: -len(p.parts),
     )
-    for p in all_paths:
-        rename_path(p)
+    with span("rename paths", cat="fs", paths=len(all_paths)):
+        for p in all_paths:
+            rename_path(p, replacements)
 
 
 def main():
     root = Path(".")
+    replacements = load_replacements()
     print(f"🚀 开始处理: {root.resolve()}")
     print("📋 替换规则:")
-    for old, new in REPLACEMENTS.items():
+    for old, new in replacements.items():
         print(f"   {old} -> {new}")
-    process(root)
+    process(root, replacements)
     print("🎉 处理完成！")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -3,9 +3,13 @@
 
 import os
 import re
-import shutil
+from collections import deque
 from pathlib import Path
 
+import profiling
+from module_profile import POM_SKIP_DIRS, ModuleProfile, load_profile, module_name
+from staging import move, write_text
+
 # ====== 可按需改的常量 ======
 ROOT_GROUP_ID = "cn.iocoder.boot"
 ROOT_ARTIFACT_ID = "future"
@@ -47,6 +51,14 @@ MOVE_PLAN = {
 # 是否把 IoT 加入聚合构建（true 就会参与 mvn package）
 ENABLE_IOT_IN_AGGREGATOR = True
 
+# modules/ 下的聚合层级：分组 -> (域级聚合 artifactId 前缀, 域列表)
+# 每个域对应目录 modules/<分组>/<域>/future-module-<域>
+MODULE_GROUPS = {
+    "core": ("core", ["system", "infra"]),
+    "biz": ("biz", ["crm", "erp", "mall"]),
+    "extend": ("ext", ["member", "bpm", "report", "mp", "pay", "ai", "iot"]),
+}
+
 
 # ====== 工具函数 ======
 def ensure_dir(p: Path):
@@ -66,7 +78,7 @@ def move_dir(src: Path, dst: Path):
         print(f"ℹ️  skip (already exists): {dst}")
         return
     ensure_dir(dst.parent)
-    shutil.move(str(src), str(dst))
+    move(src, dst)
     print(f"✅ moved: {src} -> {dst}")
 
 
@@ -82,11 +94,68 @@ def patch_root_modules(root_pom: Path):
     patched, n = re.subn(r"<modules>.*?</modules>", ROOT_MODULES_XML, txt, count=1, flags=re.DOTALL)
     if n != 1:
         raise RuntimeError("❌ root pom.xml: <modules>...</modules> block not found (or multiple unexpected blocks).")
-    root_pom.write_text(patched, encoding="utf-8")
+    write_text(root_pom, patched)
     print("✅ patched root pom.xml <modules> paths")
 
 
 PARENT_BLOCK = re.compile(r"(<parent>\s*.*?</parent>)", re.DOTALL)
+MODULE_ENTRY = re.compile(r"<module>\s*([^<]+?)\s*</module>")
+XML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
+def module_pom(pom_path: Path, module: str) -> Path:
+    """<module> 可以写目录，也可以直接写 pom 文件路径。"""
+    target = pom_path.parent / module
+    return target if module.endswith(".xml") else target / "pom.xml"
+
+
+def reactor_poms(root_pom: Path) -> tuple[list[Path], list[Path]]:
+    """
+    从 root pom 出发，沿声明的 <module>（忽略注释掉的）逐层展开 reactor。
+    返回 (reactor 内的 pom，不含 root；声明了但不存在的 module pom)。
+    只读 pom.xml，不遍历 src/ 等源码目录。
+    """
+    seen = {root_pom.resolve()}
+    poms, missing = [], []
+    queue = deque([root_pom])
+    while queue:
+        pom = queue.popleft()
+        xml = XML_COMMENT.sub("", pom.read_text(encoding="utf-8"))
+        for mod in MODULE_ENTRY.findall(xml):
+            child = module_pom(pom, mod)
+            key = child.resolve()
+            if key in seen:
+                continue
+            seen.add(key)
+            if not child.exists():
+                missing.append(child)
+                continue
+            poms.append(child)
+            queue.append(child)
+    return poms, missing
+
+
+def orphan_poms(root: Path, reactor: list[Path]) -> list[Path]:
+    """
+    reactor 模块目录下面存在、但不在 reactor 中的 pom（不会参与构建，也不会被本脚本修补）。
+    从 root 与每个 reactor 模块目录往下，只穿过没有 pom.xml 的目录，遇到第一个 pom.xml 即停：
+    能找到未聚合的 modules/extend/iot/future-module-iot 这类嵌套模块，又不扫描整棵树。
+    """
+    known = {p.resolve() for p in reactor} | {ROOT_POM.resolve()}
+    orphans = []
+    # reactor 内的模块目录本身就在起点里，遇到它们的 pom 不再往下走
+    queue = deque(sorted({root, *(p.parent for p in reactor)}))
+    while queue:
+        d = queue.popleft()
+        with os.scandir(d) as entries:
+            children = sorted(e.name for e in entries if e.is_dir() and e.name not in POM_SKIP_DIRS)
+        for name in children:
+            pom = d / name / "pom.xml"
+            if not pom.is_file():
+                queue.append(d / name)
+            elif pom.resolve() not in known:
+                orphans.append(pom)
+    return sorted(orphans)
 
 
 def patch_parent_relativepath(pom_path: Path) -> bool:
@@ -119,7 +188,7 @@ def patch_parent_relativepath(pom_path: Path) -> bool:
     new_block = block.replace("</parent>", f"{insert}\n{indent}</parent>")
 
     new_txt = txt[:m.start(1)] + new_block + txt[m.end(1):]
-    pom_path.write_text(new_txt, encoding="utf-8")
+    write_text(pom_path, new_txt)
     return True
 
 
@@ -154,57 +223,65 @@ def write_aggregator_pom(pom_path: Path, artifact_id: str, modules: list[str]):
     </modules>
 </project>
 """
-    pom_path.write_text(content, encoding="utf-8")
+    write_text(pom_path, content)
     print(f"✅ wrote aggregator pom: {pom_path}")
 
 
+def aggregated_domains(profile: ModuleProfile) -> dict[str, list[str]]:
+    """按模块配置筛选要加入聚合构建的域；没有任何域的分组整体跳过。"""
+    groups = {}
+    for group, (_, domains) in MODULE_GROUPS.items():
+        enabled = [
+            d for d in domains
+            if profile.enabled(d) and (d != "iot" or ENABLE_IOT_IN_AGGREGATOR)
+        ]
+        if enabled:
+            groups[group] = enabled
+    return groups
+
+
 def main():
     if not ROOT_POM.exists():
         raise RuntimeError("❌ Run this script at repo root (pom.xml not found).")
 
-    # 1) 移动目录
+    profile = load_profile()
+    print(f"ℹ️  module profile: {profile.name}")
+
+    # 1) 移动目录（被模块配置排除的模块在 clone 后已经删除，这里也不再处理）
     for s, d in MOVE_PLAN.items():
+        name = module_name(s)
+        if name is not None and not profile.enabled(name):
+            continue
         move_dir(Path(s), Path(d))
 
     # 2) 先 patch root pom 的 modules，让 reactor 能找到新路径下的模块
     patch_root_modules(ROOT_POM)
 
     # 3) 生成你要的 modules/ 聚合层（这些是新增的“目录聚合 pom”，不改任何业务模块的 GAV）
-    # 顶层 modules 聚合
-    write_aggregator_pom(Path("modules/pom.xml"), "future-modules", ["core", "biz", "extend"])
-
-    # core/biz/extend 聚合
-    write_aggregator_pom(Path("modules/core/pom.xml"), "future-modules-core", ["system", "infra"])
-    write_aggregator_pom(Path("modules/biz/pom.xml"), "future-modules-biz", ["crm", "erp", "mall"])
+    groups = aggregated_domains(profile)
 
-    extend_list = ["member", "bpm", "report", "mp", "pay", "ai"]
-    if ENABLE_IOT_IN_AGGREGATOR:
-        extend_list.append("iot")
-    write_aggregator_pom(Path("modules/extend/pom.xml"), "future-modules-extend", extend_list)
+    # 顶层 modules 聚合 + core/biz/extend 聚合
+    write_aggregator_pom(Path("modules/pom.xml"), "future-modules", list(groups))
+    for group, domains in groups.items():
+        write_aggregator_pom(Path(f"modules/{group}/pom.xml"), f"future-modules-{group}", domains)
 
     # 每个域下面再放一个“目录级聚合 pom”，让结构更清晰
-    # core
-    write_aggregator_pom(Path("modules/core/system/pom.xml"), "future-core-system", ["future-module-system"])
-    write_aggregator_pom(Path("modules/core/infra/pom.xml"), "future-core-infra", ["future-module-infra"])
-    # biz
-    write_aggregator_pom(Path("modules/biz/crm/pom.xml"), "future-biz-crm", ["future-module-crm"])
-    write_aggregator_pom(Path("modules/biz/erp/pom.xml"), "future-biz-erp", ["future-module-erp"])
-    write_aggregator_pom(Path("modules/biz/mall/pom.xml"), "future-biz-mall", ["future-module-mall"])
-    # extend
-    write_aggregator_pom(Path("modules/extend/member/pom.xml"), "future-ext-member", ["future-module-member"])
-    write_aggregator_pom(Path("modules/extend/bpm/pom.xml"), "future-ext-bpm", ["future-module-bpm"])
-    write_aggregator_pom(Path("modules/extend/report/pom.xml"), "future-ext-report", ["future-module-report"])
-    write_aggregator_pom(Path("modules/extend/mp/pom.xml"), "future-ext-mp", ["future-module-mp"])
-    write_aggregator_pom(Path("modules/extend/pay/pom.xml"), "future-ext-pay", ["future-module-pay"])
-    write_aggregator_pom(Path("modules/extend/ai/pom.xml"), "future-ext-ai", ["future-module-ai"])
-    if ENABLE_IOT_IN_AGGREGATOR:
-        write_aggregator_pom(Path("modules/extend/iot/pom.xml"), "future-ext-iot", ["future-module-iot"])
-
-    # 4) 给所有“父 POM=root future”的模块补 relativePath（移动后必须）
+    for group, domains in groups.items():
+        prefix = MODULE_GROUPS[group][0]
+        for d in domains:
+            write_aggregator_pom(
+                Path(f"modules/{group}/{d}/pom.xml"), f"future-{prefix}-{d}", [f"future-module-{d}"]
+            )
+
+    # 4) 沿 reactor 找到所有模块 pom，给“父 POM=root future”的模块补 relativePath（移动后必须）
+    poms, missing = reactor_poms(ROOT_POM)
+    for pom in missing:
+        print(f"⚠️  module declared but pom.xml not found: {pom}")
+    for pom in orphan_poms(Path("."), poms):
+        print(f"⚠️  orphan pom (not in reactor, left untouched): {pom}")
+
     changed = 0
-    for pom in Path(".").rglob("pom.xml"):
-        if pom.resolve() == ROOT_POM.resolve():
-            continue
+    for pom in poms:
         try:
             if patch_parent_relativepath(pom):
                 changed += 1
@@ -216,4 +293,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
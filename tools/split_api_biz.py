@@ -3,9 +3,13 @@
 
 import os
 import re
-import shutil
 from pathlib import Path
 
+import profiling
+import staging
+from java_index import TypeIndex, build_index
+from tracing import span
+
 ROOT_GROUP_ID = "cn.iocoder.boot"
 MODULE_PREFIX = "future-module-"
 SKIP_SUFFIXES = ("-api", "-biz")
@@ -24,6 +28,9 @@ EXTRA_API_PACKAGES = {
 }
 
 MOVE_API_PACKAGES = True
+
+# 只能留在 -biz 的源码：service / dal 层，以及 *Impl.java
+BIZ_ONLY_PACKAGE = re.compile(r"(?:^|/)(?:service|dal)/")
 GROUP_MALL_TRADE_FOLDER = True
 
 
@@ -33,7 +40,8 @@ def read_text(p: Path) -> str:
 
 
 def write_text(p: Path, s: str):
-    p.write_text(s, encoding="utf-8")
+    # 目标仓库可能是与上游共享内容的硬链接树，写之前必须断开链接
+    staging.write_text(p, s)
 
 
 def ensure_dir(p: Path):
@@ -202,8 +210,7 @@ def _migrate_files_no_impl(src_dir: Path, dst_dir: Path) -> int:
         if dst_file.exists():
             continue
         ensure_dir(dst_file.parent)
-        shutil.copy2(str(src_file), str(dst_file))
-        src_file.unlink()
+        staging.move(src_file, dst_file)
         moved += 1
     return moved
 
@@ -267,12 +274,78 @@ def move_api_packages(biz_dir: Path, api_dir: Path) -> int:
                 _cleanup_empty_dirs(extra_pkg_dir)
             else:
                 ensure_dir(dst_pkg_dir.parent)
-                shutil.move(str(extra_pkg_dir), str(dst_pkg_dir))
+                staging.move(extra_pkg_dir, dst_pkg_dir)
                 total_moved += sum(1 for _ in dst_pkg_dir.rglob("*") if _.is_file())
 
     return total_moved
 
 
+def relocate_files(biz_dir: Path, api_dir: Path, rels: list[str]) -> int:
+    """把 -api 源码依赖的其他文件（相对 src/main/java）逐个移到 api 模块的同一包下。"""
+    biz_java = biz_dir / "src" / "main" / "java"
+    api_java = api_dir / "src" / "main" / "java"
+    moved = 0
+    for rel in rels:
+        src_file, dst_file = biz_java / rel, api_java / rel
+        if not src_file.is_file() or dst_file.exists():
+            continue
+        ensure_dir(dst_file.parent)
+        staging.move(src_file, dst_file)
+        moved += 1
+        parent = src_file.parent
+        while parent != biz_java and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+    return moved
+
+
+# ---------- -api 依赖闭包 ----------
+def planned_api_files(java_rels: list[str]) -> set[str]:
+    """按 move_api_packages 的目录规则，列出会被移到 -api 的文件（相对 src/main/java）。"""
+    planned = set()
+    for rel in java_rels:
+        dirs = rel.split("/")[:-1]
+        if any(d in EXTRA_API_PACKAGES for d in dirs):
+            planned.add(rel)
+        elif "api" in dirs and not rel.endswith("Impl.java"):
+            planned.add(rel)
+    return planned
+
+
+def is_biz_only(rel: str) -> bool:
+    return rel.endswith("Impl.java") or bool(BIZ_ONLY_PACKAGE.search(rel))
+
+
+def plan_api_closure(repo_root: Path, base_dirs: list[Path]) -> tuple[dict[Path, list[str]], dict[Path, list[str]]]:
+    """
+    在写任何文件之前，用 Java 索引算出每个模块 -api 源码的传递依赖闭包：
+    - 闭包中不在 api/、enums/ 里的文件 → 随 api 包一起迁移（返回 {模块目录: 文件列表}）
+    - 闭包中只能留在 -biz 的文件（service / dal / *Impl）→ 返回 {模块目录: 依赖链}，拆出的 -api 将无法编译
+    """
+    java_roots = {d: d / "src" / "main" / "java" for d in base_dirs}
+    with span("java index", cat="split") as s:
+        index = build_index(repo_root, list(java_roots.values()))
+        s.set(files=len(index))
+
+    relocations: dict[Path, list[str]] = {}
+    problems: dict[Path, list[str]] = {}
+    for base_dir, java_root in java_roots.items():
+        prefix = java_root.relative_to(repo_root).as_posix() + "/"
+        module_files = [jf._replace(rel=rel.removeprefix(prefix)) for rel, jf in index.items()
+                        if rel.startswith(prefix)]
+        planned = planned_api_files([jf.rel for jf in module_files])
+        if not planned:
+            continue
+        needed = TypeIndex(module_files).closure(planned)
+        extra = sorted(rel for rel in needed if not is_biz_only(rel))
+        if extra:
+            relocations[base_dir] = extra
+        biz_only = [f"{needed[rel]} -> {rel}" for rel in sorted(needed) if is_biz_only(rel)]
+        if biz_only:
+            problems[base_dir] = biz_only
+    return relocations, problems
+
+
 # ---------- 拆分核心 ----------
 def discover_base_modules(repo_root: Path) -> list[Path]:
     """
@@ -352,7 +425,7 @@ def rename_to_biz(base_dir: Path, biz_dir: Path, base_aid: str, biz_aid: str, ap
     if biz_dir.exists():
         raise RuntimeError(f"biz dir already exists: {biz_dir}")
 
-    shutil.move(str(base_dir), str(biz_dir))
+    staging.move(base_dir, biz_dir)
 
     biz_pom = biz_dir / "pom.xml"
     biz_xml = read_text(biz_pom)
@@ -516,8 +589,8 @@ def group_mall_trade(repo_root: Path):
 
         ensure_dir(trade_dir)
 
-        shutil.move(str(api_dir), str(trade_dir / "future-module-trade-api"))
-        shutil.move(str(biz_dir), str(trade_dir / "future-module-trade-biz"))
+        staging.move(api_dir, trade_dir / "future-module-trade-api")
+        staging.move(biz_dir, trade_dir / "future-module-trade-biz")
 
         rel_parent = os.path.relpath(
             (repo_root / "pom.xml").resolve(), trade_dir.resolve()
@@ -556,11 +629,31 @@ def group_mall_trade(repo_root: Path):
 def main():
     repo_root = Path(".")
 
-    base_dirs = discover_base_modules(repo_root)
+    with span("discover base modules", cat="split") as s:
+        base_dirs = discover_base_modules(repo_root)
+        s.set(count=len(base_dirs))
     if not base_dirs:
         print("ℹ️ no base modules to split.")
         return
 
+    relocations: dict[Path, list[str]] = {}
+    if MOVE_API_PACKAGES:
+        new_api = [d for d in base_dirs
+                   if sibling_api_module_dir(d, get_project_ga(read_text(d / "pom.xml"))[1]) is None]
+        relocations, problems = plan_api_closure(repo_root, new_api)
+        # 拆出来也无法编译的模块保持不拆分，依赖它的模块继续依赖原 artifactId
+        for base_dir, lines in problems.items():
+            print(f"⚠️  {base_dir.name}: -api 源码依赖只能留在 -biz 的文件（service / dal / *Impl），保持不拆分:")
+            for line in lines:
+                print(f"     {line}")
+        base_dirs = [d for d in base_dirs if d not in problems]
+        for base_dir, rels in relocations.items():
+            if base_dir in problems:
+                continue
+            print(f"ℹ️  {base_dir.name}: -api 源码还依赖 {len(rels)} 个文件，一并迁移")
+            for rel in rels:
+                print(f"     {rel}")
+
     base_to_biz: dict[str, str] = {}
     base_has_api: dict[str, bool] = {}
 
@@ -580,31 +673,39 @@ def main():
 
         if existing_api_dir is not None:
             base_has_api[base_aid] = True
-            rename_to_biz(base_dir, biz_dir, base_aid, biz_aid, api_aid)
+            with span("rename to biz", cat="split", module=base_aid):
+                rename_to_biz(base_dir, biz_dir, base_aid, biz_aid, api_aid)
         else:
             base_has_api[base_aid] = True
-            create_api_module_from_base(
-                base_pom_xml=base_xml,
-                api_dir=api_dir,
-                api_aid=api_aid,
-                remove_aids={api_aid},
-            )
-            rename_to_biz(base_dir, biz_dir, base_aid, biz_aid, api_aid)
+            with span("create api module", cat="split", module=base_aid):
+                create_api_module_from_base(
+                    base_pom_xml=base_xml,
+                    api_dir=api_dir,
+                    api_aid=api_aid,
+                    remove_aids={api_aid},
+                )
+            with span("rename to biz", cat="split", module=base_aid):
+                rename_to_biz(base_dir, biz_dir, base_aid, biz_aid, api_aid)
 
             if MOVE_API_PACKAGES:
-                moved = move_api_packages(biz_dir, api_dir)
+                with span("move api packages", cat="split", module=base_aid) as s:
+                    moved = move_api_packages(biz_dir, api_dir)
+                    moved += relocate_files(biz_dir, api_dir, relocations.get(base_dir, []))
+                    s.set(files=moved)
                 if moved:
                     print(f"✅ moved api/enums files: {moved} ({biz_dir.name} -> {api_dir.name})")
 
         base_to_biz[base_aid] = biz_aid
 
-    patch_all_modules_and_deps(repo_root, base_to_biz, base_has_api)
+    with span("patch modules and deps", cat="split"):
+        patch_all_modules_and_deps(repo_root, base_to_biz, base_has_api)
 
     if GROUP_MALL_TRADE_FOLDER:
-        group_mall_trade(repo_root)
+        with span("group mall trade", cat="split"):
+            group_mall_trade(repo_root)
 
     print("🎉 split_api_biz done.")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+目标仓库暂存：硬链接树 + 首次写入时复制（copy-on-first-write）。
+
+batch_provision 为每个目标建一棵指向共享上游副本的硬链接树，而不是整棵复制；
+文件内容在被某个工具第一次写入之前都与上游共享。
+因此 tools/ 下所有改写已有文件的地方都必须走 write_text()，它会先断开硬链接再写。
+
+移动 / 删除同样走 move() / remove_tree()：pipeline 带检查点运行时，
+这三个函数先记操作日志（见 checkpoint.py），中途失败的阶段可以回滚。
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from checkpoint import current_journal
+
+
+def link_tree(src: Path, dst: Path) -> str:
+    """
+    在 dst 建一棵与 src 共享文件内容的硬链接树，返回实际使用的方式。
+    文件系统不支持硬链接（或跨设备）时退化为普通复制。
+    """
+    try:
+        shutil.copytree(src, dst, symlinks=True, copy_function=os.link)
+        return "hardlink"
+    except (OSError, shutil.Error):
+        if dst.exists():
+            shutil.rmtree(dst)
+        shutil.copytree(src, dst, symlinks=True)
+        return "copy"
+
+
+def write_text(path: Path, text: str):
+    """
+    写文本文件。若文件还有其他硬链接，先写同目录临时文件再 os.replace，
+    让 path 指向新 inode，共享的原内容保持不变；否则直接原地写。
+    """
+    journal = current_journal()
+    if journal is not None:
+        journal.before_write(path)
+
+    try:
+        shared = path.stat().st_nlink > 1
+    except FileNotFoundError:
+        shared = False
+
+    if not shared:
+        path.write_text(text, encoding="utf-8")
+        return
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def move(src: Path, dst: Path):
+    """shutil.move，带检查点运行时先记日志。"""
+    journal = current_journal()
+    if journal is not None:
+        journal.move(src, dst)
+    else:
+        shutil.move(str(src), str(dst))
+
+
+def remove_tree(path: Path):
+    """shutil.rmtree；带检查点运行时改为移进日志目录，回滚时可以恢复。"""
+    journal = current_journal()
+    if journal is not None:
+        journal.remove_tree(path)
+    else:
+        shutil.rmtree(path)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+极简 tracing：把 span 写成 Chrome trace-event JSON（Perfetto / chrome://tracing 可直接打开）。
+
+环境变量 CLONEBOT_TRACE 指定输出文件时才启用；未设置时 span() 返回共享的空上下文，
+不记录时间、不分配对象。
+
+    from tracing import span
+
+    with span("clone", cat="git", url=url):
+        ...
+
+workflow 里的 shell 命令可以用命令行形式包一层：
+
+    python3 tools/tracing.py clone -- git clone ...
+
+同一次运行中的多个进程（pipeline 拉起的各个工具、batch 的各个目标）追加写同一个文件：
+文件以 "[" 开头，每个进程把自己的事件以 "{...},\\n" 追加写入（O_APPEND 单次 write）。
+trace-event 格式允许省略结尾的 "]"。时间戳取系统时钟，跨进程可直接对齐。
+"""
+
+import argparse
+import atexit
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import profiling
+
+TRACE_ENV = "CLONEBOT_TRACE"
+
+# 缓冲满了或最外层 span 结束时落盘（进程池 worker 退出时不会执行 atexit）
+FLUSH_EVENTS = 512
+
+_path = os.environ.get(TRACE_ENV)
+ENABLED = bool(_path)
+if ENABLED:
+    # 子进程可能在别的目录运行，统一成绝对路径再往下传
+    _path = os.environ[TRACE_ENV] = os.path.abspath(_path)
+
+_lock = threading.Lock()
+_events: list[str] = []
+_local = threading.local()
+_named_threads: set[int] = set()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name, self.cat, self.args = name, cat, args
+
+    def set(self, **args):
+        """span 结束前补充参数（如处理的文件数）。"""
+        self.args.update(args)
+
+    def __enter__(self):
+        _local.depth = getattr(_local, "depth", 0) + 1
+        self.start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.time_ns()
+        _local.depth -= 1
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _record({
+            "name": self.name, "cat": self.cat, "ph": "X",
+            "ts": self.start // 1000, "dur": max((end - self.start) // 1000, 1),
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": self.args,
+        })
+        if _local.depth == 0:
+            flush()
+        return False
+
+
+def span(name: str, cat: str = "clonebot", **args):
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, cat, args)
+
+
+def _record(event: dict):
+    tid = event["tid"]
+    with _lock:
+        if tid not in _named_threads:
+            _named_threads.add(tid)
+            _events.append(_meta("thread_name", threading.current_thread().name, tid))
+        _events.append(json.dumps(event, ensure_ascii=False, default=str))
+        full = len(_events) >= FLUSH_EVENTS
+    if full:
+        flush()
+
+
+def _meta(kind: str, name: str, tid: int = 0) -> str:
+    return json.dumps({"name": kind, "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}},
+                      ensure_ascii=False)
+
+
+def _ensure_file(path: Path):
+    """原子地创建以 "[" 开头的文件；已存在则保持原样。"""
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".trace-")
+    try:
+        os.write(fd, b"[\n")
+        os.close(fd)
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp)
+
+
+def flush():
+    if not ENABLED:
+        return
+    with _lock:
+        if not _events:
+            return
+        data = "".join(e + ",\n" for e in _events).encode("utf-8")
+        _events.clear()
+    path = Path(_path)
+    _ensure_file(path)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _process_meta() -> str:
+    return _meta("process_name", f"{Path(sys.argv[0]).name} [{os.getpid()}]")
+
+
+def _after_fork_in_child():
+    """fork 出的进程池 worker 继承了父进程未落盘的缓冲，清掉，避免父子各写一遍。"""
+    global _lock
+    _lock = threading.Lock()  # fork 时锁可能正被父进程的其他线程持有
+    _events[:] = [_process_meta()]
+    _named_threads.clear()
+    _local.depth = 0  # fork 发生在父进程的 span 内时，worker 自己的最外层 span 结束仍要落盘
+
+
+if ENABLED:
+    _events.append(_process_meta())
+    atexit.register(flush)
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在 span 中执行一条命令（未启用 tracing 时直接执行）")
+    parser.add_argument("name", help="span 名称")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="-- 之后的命令")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("缺少要执行的命令")
+
+    with span(args.name, cat="command", command=command[0]):
+        return subprocess.run(command).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))
@@ -1,6 +1,10 @@
 import re
 from pathlib import Path
 
+import profiling
+from module_profile import iter_poms, project_artifact_id
+from staging import write_text
+
 # <!-- <module>xxx</module> -->
 MODULE_LINE = re.compile(r'^(\\s*)<!--\\s*(<module>([^<]+)</module>)\\s*-->\\s*$')
 
@@ -30,14 +34,17 @@ def get_artifact_id(block_text: str):
     m = ARTIFACT_ID.search(block_text)
     return m.group(1).strip() if m else None
 
-def should_enable_dep(block_text: str) -> bool:
+def should_enable_dep(block_text: str, present_aids: set[str] | None = None) -> bool:
     aid = get_artifact_id(block_text)
     if not aid:
         return False
+    # 模块已被 module profile 裁剪（不在当前树里）：保持注释，否则构建会找不到依赖
+    if present_aids is not None and aid not in present_aids:
+        return False
     # 只解注释 future-module-*（你要更激进的话，可以改成 return True）
     return aid.startswith("future-module-")
 
-def process_pom(pom: Path) -> bool:
+def process_pom(pom: Path, present_aids: set[str] | None = None) -> bool:
     lines = pom.read_text(encoding="utf-8").splitlines(True)
     out = []
     changed = False
@@ -62,7 +69,7 @@ def process_pom(pom: Path) -> bool:
             dep_buf.append(line)
             if DEP_END.match(line):
                 block_text = "".join(dep_buf)
-                if should_enable_dep(block_text):
+                if should_enable_dep(block_text, present_aids):
                     new_block = [uncomment_line(x) for x in dep_buf]
                     out.extend(new_block)
                     if "".join(new_block) != block_text:
@@ -76,17 +83,22 @@ def process_pom(pom: Path) -> bool:
         out.extend(dep_buf)
 
     if changed:
-        pom.write_text("".join(out), encoding="utf-8")
+        write_text(pom, "".join(out))
     return changed
 
 def main():
     root = Path(".")
-    poms = list(root.rglob("pom.xml"))
+    poms = list(iter_poms(root))
+    present_aids = set()
+    for pom in poms:
+        aid = project_artifact_id(pom.read_text(encoding="utf-8"))
+        if aid:
+            present_aids.add(aid)
     changed_cnt = 0
 
     for pom in poms:
         try:
-            if process_pom(pom):
+            if process_pom(pom, present_aids):
                 print(f"✅ updated: {pom}")
                 changed_cnt += 1
         except Exception as e:
@@ -95,4 +107,4 @@ def main():
     print(f"🎉 done. changed pom count = {changed_cnt}")
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
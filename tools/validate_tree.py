@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+转换结果的快速不变量检查（在 create / push 之前运行，替代“推上去等 mvn package 报错”）。
+
+检查项：
+1. 除白名单外，文件内容和路径里不再出现 yudao / ruoyi
+2. 每个 <module> 都有对应的 pom.xml
+3. 每个 <parent> 通过 <relativePath>（缺省 ../pom.xml）能找到 GAV 一致的父 pom
+4. 每个 -biz 模块依赖同名的 -api 模块
+5. -api 模块的源码不 import service / dal 包
+6. reactor 内没有重复的 artifactId
+
+只读，不修改任何文件。
+"""
+
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import profiling
+from pipeline import path_matches
+from restructure_layout import XML_COMMENT, reactor_poms
+from split_api_biz import RE_DEP_A, RE_DEP_BLOCK, RE_DEP_G, RE_PARENT_BLOCK
+from tracing import span
+
+LEFTOVER_TOKEN = re.compile(r"yudao|ruoyi", re.IGNORECASE)
+
+# 允许保留上游名称的路径（glob，相对仓库根）
+TOKEN_ALLOWLIST = (
+    "LICENSE",
+    "**/*.md",
+)
+
+SKIP_DIRS = {".git", ".idea", "target", "node_modules", "__pycache__"}
+FORBIDDEN_API_IMPORT = re.compile(r"^import\s+(?:static\s+)?[\w.]*\.(?:service|dal)\.", re.MULTILINE)
+
+# 项目自身坐标只会出现在这些段落之前
+PROJECT_HEAD_END = re.compile(r"<(?:dependencies|dependencyManagement|build|profiles|modules|properties)>")
+
+SCAN_CHUNK = 256
+MAX_REPORT_PER_CHECK = 30
+
+
+# ---------- 1) 残留 token（多进程扫描） ----------
+def _scan_chunk(root: str, rels: list[str]) -> list[str]:
+    with span("scan batch", cat="validate", files=len(rels)):
+        return _scan_files(root, rels)
+
+
+def _scan_files(root: str, rels: list[str]) -> list[str]:
+    problems = []
+    for rel in rels:
+        if LEFTOVER_TOKEN.search(rel):
+            problems.append(f"{rel}: 路径包含上游名称")
+        try:
+            with open(os.path.join(root, rel), "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if b"\0" in data:
+            continue  # 二进制文件
+        text = data.decode("utf-8", errors="replace")
+        m = LEFTOVER_TOKEN.search(text)
+        if m:
+            line = text.count("\n", 0, m.start()) + 1
+            problems.append(f"{rel}:{line}: 残留 '{m.group(0)}'")
+    return problems
+
+
+def list_files(root: Path) -> list[str]:
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            rel = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            if not path_matches(rel, TOKEN_ALLOWLIST):
+                files.append(rel)
+    return files
+
+
+def check_leftover_tokens(root: Path) -> list[str]:
+    files = list_files(root)
+    chunks = [files[i:i + SCAN_CHUNK] for i in range(0, len(files), SCAN_CHUNK)]
+    if len(chunks) <= 1:
+        return _scan_chunk(str(root), files)
+    with ProcessPoolExecutor() as pool:
+        results = pool.map(_scan_chunk, [str(root)] * len(chunks), chunks)
+    return [p for chunk in results for p in chunk]
+
+
+# ---------- 2~6) reactor 检查 ----------
+def parent_gav(pom_xml: str) -> tuple[str | None, str | None, str | None]:
+    """返回 (parent groupId, parent artifactId, relativePath)，没有 <parent> 时全为 None。"""
+    m = RE_PARENT_BLOCK.search(pom_xml)
+    if not m:
+        return None, None, None
+    block = m.group(1)
+    gm, am = RE_DEP_G.search(block), RE_DEP_A.search(block)
+    rm = re.search(r"<relativePath>\s*([^<]*?)\s*</relativePath>", block)
+    return (
+        gm.group(1).strip() if gm else None,
+        am.group(1).strip() if am else None,
+        rm.group(1).strip() if rm else "../pom.xml",
+    )
+
+
+def effective_ga(pom_xml: str) -> tuple[str | None, str | None]:
+    """项目自己的 (groupId, artifactId)；groupId 缺省时继承 parent 的 groupId。"""
+    head = RE_PARENT_BLOCK.sub("", pom_xml, count=1)
+    m = PROJECT_HEAD_END.search(head)
+    if m:
+        head = head[:m.start()]
+    gm, am = RE_DEP_G.search(head), RE_DEP_A.search(head)
+    gid = gm.group(1).strip() if gm else parent_gav(pom_xml)[0]
+    return gid, (am.group(1).strip() if am else None)
+
+
+def check_reactor(root: Path) -> dict[str, list[str]]:
+    problems: dict[str, list[str]] = {
+        "module": [], "parent": [], "biz-api": [], "api-imports": [], "duplicate": [],
+    }
+    root_pom = root / "pom.xml"
+    poms, missing = reactor_poms(root_pom)
+    for pom in missing:
+        problems["module"].append(f"{pom.relative_to(root)}: <module> 声明了但 pom.xml 不存在")
+
+    xml_of = {pom: XML_COMMENT.sub("", pom.read_text(encoding="utf-8")) for pom in [root_pom, *poms]}
+    ga_of = {pom: effective_ga(xml) for pom, xml in xml_of.items()}
+
+    # 3) parent / relativePath
+    for pom in poms:
+        pgid, paid, rel = parent_gav(xml_of[pom])
+        if paid is None or not rel:
+            continue  # 无 parent，或 relativePath 为空（显式从仓库解析）
+        target = (pom.parent / rel).resolve()
+        if target.is_dir():
+            target = target / "pom.xml"
+        if not target.exists():
+            problems["parent"].append(f"{pom.relative_to(root)}: relativePath {rel} 不存在")
+            continue
+        tgid, taid = effective_ga(XML_COMMENT.sub("", target.read_text(encoding="utf-8")))
+        if (tgid, taid) != (pgid, paid):
+            problems["parent"].append(
+                f"{pom.relative_to(root)}: parent 应为 {pgid}:{paid}，relativePath 指向 {tgid}:{taid}"
+            )
+
+    # 6) 重复 artifactId
+    seen: dict[str, Path] = {}
+    for pom in [root_pom, *poms]:
+        aid = ga_of[pom][1]
+        if not aid:
+            continue
+        if aid in seen:
+            problems["duplicate"].append(
+                f"{aid}: {seen[aid].relative_to(root)} 与 {pom.relative_to(root)}"
+            )
+        else:
+            seen[aid] = pom
+
+    # 4) -biz 依赖 -api
+    for pom in poms:
+        gid, aid = ga_of[pom]
+        if not aid or not aid.endswith("-biz"):
+            continue
+        api_aid = aid[: -len("-biz")] + "-api"
+        if api_aid not in seen:
+            continue
+        deps = {
+            (g.group(1).strip() if (g := RE_DEP_G.search(d)) else None, a.group(1).strip())
+            for d in RE_DEP_BLOCK.findall(xml_of[pom])
+            if (a := RE_DEP_A.search(d))
+        }
+        if (ga_of[seen[api_aid]][0], api_aid) not in deps:
+            problems["biz-api"].append(f"{aid}: 缺少对 {api_aid} 的依赖")
+
+    # 5) -api 源码不能引用 service / dal
+    for pom in poms:
+        aid = ga_of[pom][1]
+        java_root = pom.parent / "src" / "main" / "java"
+        if not aid or not aid.endswith("-api") or not java_root.exists():
+            continue
+        for java in java_root.rglob("*.java"):
+            m = FORBIDDEN_API_IMPORT.search(java.read_text(encoding="utf-8", errors="replace"))
+            if m:
+                problems["api-imports"].append(f"{java.relative_to(root)}: {m.group(0).strip()}")
+
+    return problems
+
+
+CHECK_TITLES = {
+    "tokens": "残留的 yudao / ruoyi",
+    "module": "<module> 缺少 pom.xml",
+    "parent": "<parent> / relativePath 不一致",
+    "biz-api": "-biz 未依赖 -api",
+    "api-imports": "-api 引用了 service / dal",
+    "duplicate": "重复的 artifactId",
+}
+
+
+def validate(root: Path) -> dict[str, list[str]]:
+    with span("leftover tokens", cat="validate"):
+        problems = {"tokens": check_leftover_tokens(root)}
+    with span("reactor checks", cat="validate"):
+        problems.update(check_reactor(root))
+    return problems
+
+
+def main():
+    root = Path(".")
+    if not (root / "pom.xml").exists():
+        print("❌ Run this script at repo root (pom.xml not found).")
+        return 1
+
+    print("🔍 检查转换结果...")
+    problems = validate(root)
+
+    total = 0
+    for key, title in CHECK_TITLES.items():
+        items = problems.get(key, [])
+        total += len(items)
+        if not items:
+            print(f"✅ {title}: 无")
+            continue
+        print(f"❌ {title}: {len(items)} 处")
+        for item in sorted(items)[:MAX_REPORT_PER_CHECK]:
+            print(f"   {item}")
+        if len(items) > MAX_REPORT_PER_CHECK:
+            print(f"   ... 另有 {len(items) - MAX_REPORT_PER_CHECK} 处")
+
+    if total:
+        print(f"❌ 检查未通过，共 {total} 处问题")
+        return 1
+    print("🎉 检查通过！")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profiling.run(main))